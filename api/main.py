@@ -1,31 +1,87 @@
-import logging
+# Imported first: startup timings are measured from here
+from common.startup import StartupTracker
+
+import asyncio
+from contextlib import asynccontextmanager
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 
+from api.db import db
 from api.routers.campaigns import router as campaigns_router
 from api.routers.events import router as events_router
 from api.routers.auth import router as auth_router
+from api.routers.debug import router as debug_router
+from api.utils.admission import admission
+from api.utils.publisher import publisher
+from common.config import config
+from common.logger import get_logger, setup_logging
 from common.metrics import registry, service_up
+from common.utils import calculate_backoff_delay
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+setup_logging()
+logger = get_logger(__name__)
+
+startup = StartupTracker("api")
+
+async def warm_up():
+    """
+    Open Redis and DB connections, retrying until both are reachable, then
+    report ready.
+    """
+    attempt = 0
+    while True:
+        try:
+            with startup.phase("redis"):
+                await publisher.warm(config.REDIS_WARM_CONNECTIONS)
+            with startup.phase("database"):
+                await db.warm(config.DB_WARM_CONNECTIONS)
+            break
+        except Exception as e:
+            logger.warning(f"Startup warm-up failed, retrying: {e}")
+            await asyncio.sleep(calculate_backoff_delay(min(attempt, 5), jitter=True))
+            attempt += 1
+    startup.mark_ready()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await publisher.start()
+    admission.client = publisher.client
+    service_up.labels(service="api").set(1)
+    warm_task = asyncio.create_task(warm_up())
+    yield
+    startup.mark_not_ready()
+    warm_task.cancel()
+    service_up.labels(service="api").set(0)
+    await publisher.close()
+    await db.dispose()
 
 app = FastAPI(
     title="Campaign Manager API",
     description="API for managing campaigns and processing events",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 app.include_router(campaigns_router, prefix="/campaigns", tags=["campaigns"])
 app.include_router(events_router, prefix="/events", tags=["events"])
+app.include_router(debug_router, prefix="/debug", tags=["debug"])
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once connections are warm, 503 before and while shutting down."""
+    return JSONResponse(
+        {"status": "ready" if startup.ready else "starting", **startup.report()},
+        status_code=200 if startup.ready else 503,
+    )
+
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
@@ -1,22 +1,59 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Index
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
-from sqlalchemy.ext.declarative import declarative_base
 
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
 
 class Campaign(Base):
     __tablename__ = "campaigns"
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String, nullable=False)
-    rules = Column(JSON, nullable=False)  # e.g., {"event_type": "purchase"}
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Typed mappings, so API responses built from a Campaign type-check
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    rules: Mapped[dict] = mapped_column(JSON, nullable=False)  # {"event_type": ...}
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # Live from starts_at (NULL: immediately) until ends_at (NULL: forever)
+    starts_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    ends_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    # Global trigger cap (NULL: uncapped)
+    max_triggers: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+class UserProfile(Base):
+    __tablename__ = "user_profiles"
+
+    user_id = Column(String, primary_key=True)
+    attributes = Column(JSON, nullable=False)  # e.g., {"age": 31, "tier": "gold"}
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # "which events triggered campaign X": campaign_triggers @> ARRAY[X]
+        Index(
+            "ix_events_campaign_triggers", "campaign_triggers", postgresql_using="gin"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     event_id = Column(String, unique=True, nullable=False)  # idempotency key
-    payload = Column(JSON, nullable=False)
-    campaign_triggers = Column(JSON, nullable=True)  # list of triggered campaign ids
+    event_type = Column(String, nullable=True, index=True)  # copied from payload
+    user_id = Column(String, nullable=True, index=True)  # copied from payload
+    payload = Column(JSONB, nullable=False)  # large values are lz4-compressed by TOAST
+    # Triggered campaign ids
+    campaign_triggers: Mapped[Optional[list[int]]] = mapped_column(
+        ARRAY(Integer), nullable=True
+    )
     processed_at = Column(DateTime(timezone=True), nullable=True)
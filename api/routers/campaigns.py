@@ -1,61 +1,227 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from api.db import get_session
 from api.models import Campaign
-from api.schemas.campaign import CampaignCreate, CampaignOut
+from api.schemas.campaign import CampaignBulkOut, CampaignCreate, CampaignOut
+from api.utils.campaign_bulk import (
+    BulkValidationError,
+    copy_campaigns,
+    parse_bulk_body,
+    validate_campaigns,
+)
+from api.utils.logger import get_logger
+from api.utils.publisher import publisher
+from api.utils.response_cache import bump_campaigns_version, response_cache
 from common.auth import get_current_active_user, get_admin_user, User
+from common.config import config
+from common.constants import CAMPAIGNS_CHANGED_CHANNEL, RULE_PROFILE_KEY
 from common.metrics import campaigns_created_total
+from common.rule_analysis import RuleValidationError, analyze_rule
+from common.rule_profiler import (
+    PROFILE_SORT_KEYS,
+    live_reports,
+    merge_stats,
+    top_campaigns,
+)
+from common.utils import retry_with_backoff
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-@router.get("/")
-async def list_campaigns():
-    async with get_session() as session:
-        result = await session.execute(select(Campaign))
-        campaigns = result.scalars().all()
-        return [
-            CampaignOut(
-                id=db_campaign.id,
-                name=db_campaign.name,
-                rules=db_campaign.rules,
-                created_at=db_campaign.created_at.isoformat()
-            )
-            for db_campaign in campaigns
-        ]
+async def notify_campaigns_changed():
+    """
+    Invalidate cached read responses and tell workers to reload campaigns now
+    instead of after CAMPAIGN_CACHE_TTL.
+    """
+    try:
+        await retry_with_backoff(
+            lambda: bump_campaigns_version(publisher.client), base_delay=0.05
+        )
+    except Exception as e:
+        # Nothing else invalidates the cached responses before they expire
+        logger.error(
+            "Campaign version bump failed, cached campaign reads may be stale "
+            f"for up to {config.CAMPAIGN_RESPONSE_CACHE_TTL:g}s: {e}"
+        )
+    try:
+        await publisher.client.publish(CAMPAIGNS_CHANGED_CHANNEL, "1")
+    except Exception as e:
+        # Workers still pick the change up on their next periodic reload
+        logger.warning(f"Campaign change notification failed: {e}")
 
-@router.get("/{campaign_id}")
-async def get_campaign(campaign_id: int):
-    async with get_session() as session:
-        result = await session.execute(select(Campaign).where(Campaign.id == campaign_id))
-        db_campaign = result.scalars().first()
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
 
-        if not db_campaign:
-            raise HTTPException(status_code=404, detail="Campaign not found")
+def _campaign_out(db_campaign: Campaign) -> CampaignOut:
+    return CampaignOut(
+        id=db_campaign.id,
+        name=db_campaign.name,
+        rules=db_campaign.rules,
+        created_at=db_campaign.created_at.isoformat(),
+        starts_at=_isoformat(db_campaign.starts_at),
+        ends_at=_isoformat(db_campaign.ends_at),
+        max_triggers=db_campaign.max_triggers
+    )
 
-        return CampaignOut(
-            id=db_campaign.id,
-            name=db_campaign.name,
-            rules=db_campaign.rules,
-            created_at=db_campaign.created_at.isoformat()
+@router.get("/", response_model=list[CampaignOut])
+async def list_campaigns(if_none_match: str | None = Header(None)):
+    async def build():
+        async with get_session() as session:
+            result = await session.execute(select(Campaign))
+            return [_campaign_out(c) for c in result.scalars().all()]
+
+    return await response_cache.respond(publisher.client, "list", if_none_match, build)
+
+@router.get("/profile")
+async def campaign_profile(
+    top: int = Query(10, ge=1, le=1000),
+    sort: str = Query("mean"),
+    current_user: User = Depends(get_admin_user),
+):
+    """Most expensive campaign rules, from the workers' sampled profiles."""
+    if sort not in PROFILE_SORT_KEYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"sort must be one of {', '.join(PROFILE_SORT_KEYS)}",
         )
+    if publisher.client is None:
+        raise HTTPException(status_code=503, detail="Redis unavailable")
+    reports, _ = live_reports(
+        await publisher.client.hgetall(RULE_PROFILE_KEY),
+        time.time(),
+        config.RULE_PROFILE_STALE_AFTER,
+    )
+    stats = merge_stats(reports)
+    return {
+        "workers": len(reports),
+        "sort": sort,
+        "campaigns": top_campaigns(stats, top, sort),
+    }
+
+@router.get("/export")
+async def export_campaigns(current_user: User = Depends(get_admin_user)):
+    """Stream all campaigns as NDJSON, in a format `POST /campaigns/bulk` accepts."""
+    async def lines():
+        async with get_session() as session:
+            result = await session.stream(
+                select(
+                    Campaign.id, Campaign.name, Campaign.rules, Campaign.created_at,
+                    Campaign.starts_at, Campaign.ends_at, Campaign.max_triggers,
+                )
+                .order_by(Campaign.id)
+                .execution_options(yield_per=config.CAMPAIGN_EXPORT_CHUNK)
+            )
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps({
+                        "id": row.id,
+                        "name": row.name,
+                        "rules": row.rules,
+                        "created_at": _isoformat(row.created_at),
+                        "starts_at": _isoformat(row.starts_at),
+                        "ends_at": _isoformat(row.ends_at),
+                        "max_triggers": row.max_triggers,
+                    }) + "\n"
+                    for row in rows
+                )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/{campaign_id}", response_model=CampaignOut)
+async def get_campaign(campaign_id: int, if_none_match: str | None = Header(None)):
+    async def build():
+        async with get_session() as session:
+            result = await session.execute(
+                select(Campaign).where(Campaign.id == campaign_id)
+            )
+            db_campaign = result.scalars().first()
+
+            if not db_campaign:
+                raise HTTPException(status_code=404, detail="Campaign not found")
+
+            return _campaign_out(db_campaign)
+
+    return await response_cache.respond(
+        publisher.client, f"campaign:{campaign_id}", if_none_match, build
+    )
 
 @router.post("/", response_model=CampaignOut)
 async def create_campaign(campaign: CampaignCreate, current_user: User = Depends(get_admin_user)) -> CampaignOut:
+    # Reject rules the worker can't evaluate, and store them in the
+    # cheapest-first evaluation order
+    try:
+        rules, plan = analyze_rule(campaign.rules)
+    except RuleValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid campaign rules: {e}")
+
     async with get_session() as session:
         # Check if campaign with same name exists?
         # For now, just create
         campaigns_created_total.inc()
-        db_campaign = Campaign(name=campaign.name, rules=campaign.rules)
+        db_campaign = Campaign(
+            name=campaign.name,
+            rules=rules,
+            starts_at=campaign.starts_at,
+            ends_at=campaign.ends_at,
+            max_triggers=campaign.max_triggers
+        )
         session.add(db_campaign)
         await session.commit()
         await session.refresh(db_campaign)
+        await notify_campaigns_changed()
 
         # Convert to out model
-        return CampaignOut(
-            id=db_campaign.id,
-            name=db_campaign.name,
-            rules=db_campaign.rules,
-            created_at=db_campaign.created_at.isoformat()
+        return _campaign_out(db_campaign).model_copy(update={"plan": plan})
+
+@router.post("/bulk", response_model=CampaignBulkOut)
+async def bulk_create_campaigns(
+    request: Request, current_user: User = Depends(get_admin_user)
+) -> CampaignBulkOut:
+    """
+    Import many campaigns at once from a JSON array or NDJSON body.
+
+    All campaigns are validated before anything is written; one invalid
+    campaign rejects the whole batch. Valid batches are inserted with a
+    single COPY in one transaction.
+    """
+    body = await request.body()
+    # Parsing and validating tens of thousands of campaigns takes CPU seconds;
+    # run them off the event loop so other requests keep being served
+    try:
+        items = await asyncio.to_thread(
+            parse_bulk_body, body, request.headers.get("content-type")
         )
+    except ValueError as e:  # includes JSON decode errors
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {e}")
+    if len(items) > config.CAMPAIGN_BULK_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {config.CAMPAIGN_BULK_MAX} campaigns per request",
+        )
+    if not items:
+        return CampaignBulkOut(count=0, ids=[])
+
+    try:
+        campaigns = await asyncio.to_thread(validate_campaigns, items)
+    except BulkValidationError as e:
+        raise HTTPException(
+            status_code=422, detail={"invalid": e.total, "errors": e.errors}
+        )
+
+    async with get_session() as session:
+        ids = await copy_campaigns(session, campaigns)
+        await session.commit()
+
+    campaigns_created_total.inc(len(ids))
+    await notify_campaigns_changed()
+    logger.info(f"Bulk imported {len(ids)} campaigns")
+    return CampaignBulkOut(count=len(ids), ids=ids)
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from common.auth import get_admin_user, User
+
+router = APIRouter()
+
+_profile_lock = asyncio.Lock()
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def cpu_profile(
+    seconds: float = Query(10, gt=0, le=120),
+    current_user: User = Depends(get_admin_user),
+):
+    """Sample all threads for `seconds` and return a collapsed-stack flamegraph file."""
+    from common.debug_profiler import format_collapsed, sample_stacks
+
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        stacks = await asyncio.to_thread(sample_stacks, seconds)
+    filename = f"api-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        format_collapsed(stacks),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/heap")
+async def heap_snapshot(
+    top: int = Query(25, ge=1, le=500),
+    current_user: User = Depends(get_admin_user),
+):
+    """
+    Allocation sites that grew the most since the previous call (the first call
+    starts tracing).
+    """
+    from common.debug_profiler import heap_tracker
+
+    return await asyncio.to_thread(heap_tracker.snapshot, top)
+
+@router.delete("/heap")
+async def stop_heap_tracing(current_user: User = Depends(get_admin_user)):
+    """Stop tracemalloc and drop the stored snapshot."""
+    from common.debug_profiler import heap_tracker
+
+    heap_tracker.stop()
+    return {"status": "stopped"}
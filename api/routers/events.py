@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
 
+from api.utils.admission import admission
 from api.utils.publisher import publish_event
 from api.schemas.event import EventCreate, EventOut
+from common.config import config
 from common.utils import validate_event_payload
 from common.metrics import events_received_total
 
@@ -16,6 +18,14 @@ async def receive_event(event: EventCreate) -> EventOut:
     # Increment metrics
     events_received_total.inc()
 
+    # Shed load while the workers are behind
+    if not await admission.admit(event.payload.get("event_type")):
+        raise HTTPException(
+            status_code=429,
+            detail="Event queue is saturated, retry later",
+            headers={"Retry-After": str(config.ADMISSION_RETRY_AFTER)},
+        )
+
     # Publish to queue
     await publish_event(event.dict())
 
@@ -1,9 +1,28 @@
-from pydantic import BaseModel
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class CampaignCreate(BaseModel):
     name: str
     rules: dict
+    starts_at: datetime | None = None
+    ends_at: datetime | None = None
+    max_triggers: int | None = Field(default=None, ge=1)
+
+    @field_validator("starts_at", "ends_at")
+    @classmethod
+    def assume_utc(cls, value: datetime | None) -> datetime | None:
+        # Naive times are taken as UTC, so they compare with aware ones
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    @model_validator(mode="after")
+    def check_schedule(self):
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValueError("ends_at must be after starts_at")
+        return self
 
 
 class CampaignOut(BaseModel):
@@ -11,3 +30,12 @@ class CampaignOut(BaseModel):
     name: str
     rules: dict
     created_at: str
+    starts_at: str | None = None
+    ends_at: str | None = None
+    max_triggers: int | None = None
+    plan: dict | None = None  # evaluation plan, returned on create
+
+
+class CampaignBulkOut(BaseModel):
+    count: int
+    ids: list[int]  # in request order
@@ -10,5 +10,5 @@ class EventOut(BaseModel):
     id: int
     event_id: str
     payload: dict
-    campaign_triggers: dict | None = None
+    campaign_triggers: list[int] | None = None
     processed_at: str | None = None
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Optional
+
+from api.utils.logger import get_logger
+from common.config import config
+from common.constants import EVENTS_CONSUMER_GROUP
+from common.metrics import (
+    event_partition_lag,
+    event_partitions,
+    events_in_queue,
+    events_pending,
+    events_shed_total,
+)
+from common.partitions import stream_key
+
+logger = get_logger(__name__)
+
+
+class AdmissionController:
+    """
+    Sheds incoming events when the workers fall behind.
+
+    Queue lag is the total length of the partition streams (workers delete
+    entries once acknowledged, so this is undelivered + in-flight). It is probed
+    at most once per `probe_interval` seconds and cached in between, so the hot
+    path costs a clock read. Event types listed in `priority_event_types` are
+    admitted up to a separate, higher watermark so they keep flowing while
+    low-value events are shed.
+    """
+
+    def __init__(
+        self,
+        client,
+        high_watermark: int,
+        priority_high_watermark: int,
+        priority_event_types: list[str],
+        probe_interval: float,
+        partitions: int = 1,
+    ):
+        self.client = client
+        self.partitions = partitions
+        self.high_watermark = high_watermark
+        self.priority_high_watermark = priority_high_watermark
+        self.priority_event_types = frozenset(priority_event_types)
+        self.probe_interval = probe_interval
+        self.lag = 0
+        self.pending = 0
+        self._probed_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _probe(self) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for partition in range(self.partitions):
+            pipe.xlen(stream_key(partition))
+            pipe.xpending(stream_key(partition), EVENTS_CONSUMER_GROUP)
+        results = await pipe.execute(raise_on_error=False)
+
+        # A stream or group may not exist yet (no events published, no worker
+        # started); treat that as an empty partition.
+        self.lag = self.pending = 0
+        for partition in range(self.partitions):
+            length, pending = results[2 * partition], results[2 * partition + 1]
+            length = length if isinstance(length, int) else 0
+            self.lag += length
+            self.pending += pending["pending"] if isinstance(pending, dict) else 0
+            event_partition_lag.labels(partition=str(partition)).set(length)
+        event_partitions.set(self.partitions)
+        events_in_queue.set(self.lag)
+        events_pending.set(self.pending)
+
+    async def current_lag(self) -> int:
+        """Return the cached queue lag, refreshing it if the probe is stale."""
+        if time.monotonic() - self._probed_at < self.probe_interval:
+            return self.lag
+
+        async with self._lock:
+            # Another request may have refreshed the probe while we waited
+            if time.monotonic() - self._probed_at >= self.probe_interval:
+                try:
+                    await self._probe()
+                except Exception as e:
+                    # Fail open: if Redis is unreachable the publish will fail anyway
+                    logger.warning(f"Queue lag probe failed: {e}")
+                self._probed_at = time.monotonic()
+        return self.lag
+
+    async def admit(self, event_type: Optional[str]) -> bool:
+        """Return True if an event of this type should be accepted."""
+        lag = await self.current_lag()
+        if event_type in self.priority_event_types:
+            if lag < self.priority_high_watermark:
+                return True
+            events_shed_total.labels(lane="priority").inc()
+            return False
+
+        if lag < self.high_watermark:
+            return True
+        events_shed_total.labels(lane="default").inc()
+        return False
+
+
+# The Redis client is attached in the API lifespan, once the publisher's pool is open
+admission = AdmissionController(
+    None,
+    high_watermark=config.ADMISSION_HIGH_WATERMARK,
+    priority_high_watermark=config.ADMISSION_PRIORITY_HIGH_WATERMARK,
+    priority_event_types=config.ADMISSION_PRIORITY_EVENT_TYPES,
+    probe_interval=config.ADMISSION_LAG_PROBE_INTERVAL,
+    partitions=config.EVENT_PARTITIONS,
+)
@@ -1,17 +1,139 @@
 import asyncio
 import json
-import os
+import time
+from typing import Optional
 
 from redis import asyncio as redis
 
-from common.constants import EVENTS_QUEUE
+from common.config import config
+from common.metrics import publish_batch_size, publish_latency_seconds
+from common.partitions import partition_for, stream_key
 from api.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
-redis_client = redis.from_url(REDIS_URL)
+
+class EventPublisher:
+    """
+    Appends events to the Redis streams, coalescing concurrent publishes.
+
+    Each event goes to the stream of its partition (hash of `user_id`), so a
+    user's events stay in order while partitions are processed in parallel.
+
+    Publishes arriving within `linger` seconds of each other (or until
+    `max_batch` are waiting) are sent as one pipelined round trip. Each caller
+    still awaits the outcome of its own XADD, so an error is only raised to
+    the request it belongs to. Connections come from a pool of at most
+    `max_connections`, opened in `start` and released in `close`.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        max_connections: int,
+        linger: float,
+        max_batch: int,
+        partitions: int = 1,
+    ):
+        self.redis_url = redis_url
+        self.partitions = partitions
+        self.max_connections = max_connections
+        self.linger = linger
+        self.max_batch = max_batch
+        self.client: Optional[redis.Redis] = None
+        self._pending: list[tuple[str, str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    async def start(self):
+        pool = redis.ConnectionPool.from_url(
+            self.redis_url, max_connections=self.max_connections
+        )
+        self.client = redis.Redis(connection_pool=pool)
+        logger.info(f"Event publisher connected (pool size {self.max_connections})")
+
+    async def warm(self, connections: int):
+        """Open `connections` pooled connections now rather than on first publish."""
+        client = self.client
+        if client is None:
+            raise RuntimeError("Event publisher must be started before warming it")
+        count = min(connections, self.max_connections)
+        await asyncio.gather(*(client.ping() for _ in range(count)))
+
+    async def close(self):
+        if self._flush_task is not None:
+            # Don't wait out the linger; whatever is pending is flushed now
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._pending:
+            await self._flush()
+        await asyncio.gather(*list(self._inflight), return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+            await self.client.connection_pool.disconnect()
+            self.client = None
+
+    async def publish(self, event: dict) -> bytes:
+        """Append an event to the stream and return its stream entry id."""
+        logger.debug("Publishing event %s", event.get("event_id"))
+
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        user_id = (event.get("payload") or {}).get("user_id")
+        stream = stream_key(partition_for(user_id, self.partitions))
+        self._pending.append((stream, json.dumps(event), future))
+
+        if len(self._pending) >= self.max_batch:
+            self._spawn(self._flush())
+        elif self._flush_task is None:
+            self._flush_task = self._spawn(self._flush_later())
+
+        try:
+            return await future
+        finally:
+            publish_latency_seconds.observe(time.perf_counter() - start)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.linger)
+        self._flush_task = None
+        await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        publish_batch_size.observe(len(batch))
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for stream, data, _ in batch:
+                pipe.xadd(stream, {"data": data})
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue  # Caller went away (request cancelled)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+publisher = EventPublisher(
+    config.REDIS_URL,
+    max_connections=config.REDIS_MAX_CONNECTIONS,
+    linger=config.PUBLISH_LINGER_MS / 1000,
+    max_batch=config.PUBLISH_MAX_BATCH,
+    partitions=config.EVENT_PARTITIONS,
+)
 
 async def publish_event(event: dict):
-    logger.info(f"Publishing event: {event}")
-    await redis_client.publish(EVENTS_QUEUE, json.dumps(event))
+    return await publisher.publish(event)
@@ -0,0 +1,135 @@
+import hashlib
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from api.utils.logger import get_logger
+from common.config import config
+from common.constants import CAMPAIGN_RESPONSE_PREFIX, CAMPAIGNS_VERSION_KEY
+from common.metrics import response_bytes_saved_total, response_cache_requests_total
+from common.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag` (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = if_none_match.split(",")
+    return any(tag.strip().removeprefix("W/") == etag for tag in tags)
+
+
+class ResponseCache:
+    """
+    Pre-serialized JSON responses for campaign reads.
+
+    Entries are keyed by route and the campaign-table version, a Redis counter
+    every campaign write increments, so a write makes all older entries
+    unreachable without having to find and delete them. With `shared` the
+    serialized bodies are also stored in Redis so API replicas fill the cache
+    for each other. If the version can't be read the cache is bypassed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared: bool = False):
+        self.ttl = ttl
+        self.shared = shared
+        self._local = TTLCache(maxsize, ttl)
+
+    async def version(self, client) -> Optional[int]:
+        if client is None:
+            return None
+        try:
+            return int(await client.get(CAMPAIGNS_VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(
+                f"Campaign version unavailable, bypassing response cache: {e}"
+            )
+            return None
+
+    async def get(self, client, route: str, version: int) -> Optional[CachedResponse]:
+        entry = self._local.get((route, version))
+        if entry is not None or not self.shared:
+            return entry
+        try:
+            body = await client.get(f"{CAMPAIGN_RESPONSE_PREFIX}{version}:{route}")
+        except Exception as e:
+            logger.warning(f"Shared response cache read failed: {e}")
+            return None
+        if body is None:
+            return None
+        entry = CachedResponse(body, make_etag(body))
+        self._local.set((route, version), entry)
+        return entry
+
+    async def set(
+        self, client, route: str, version: int, body: bytes
+    ) -> CachedResponse:
+        entry = CachedResponse(body, make_etag(body))
+        self._local.set((route, version), entry)
+        if self.shared:
+            try:
+                await client.set(
+                    f"{CAMPAIGN_RESPONSE_PREFIX}{version}:{route}",
+                    body,
+                    ex=max(1, int(self.ttl)),
+                )
+            except Exception as e:
+                logger.warning(f"Shared response cache write failed: {e}")
+        return entry
+
+    async def respond(
+        self,
+        client,
+        route: str,
+        if_none_match: Optional[str],
+        build: Callable[[], Awaitable[object]],
+    ) -> Response:
+        """
+        Serve `route` from the cache, calling `build` (which reads the
+        database) only on a miss. Returns 304 when the client's ETag is current.
+        """
+        version = await self.version(client)
+        entry = None if version is None else await self.get(client, route, version)
+        response_cache_requests_total.labels(
+            result="bypass" if version is None else "miss" if entry is None else "hit"
+        ).inc()
+
+        if entry is None:
+            body = bytes(JSONResponse(content=jsonable_encoder(await build())).body)
+            if version is None:
+                entry = CachedResponse(body, make_etag(body))
+            else:
+                entry = await self.set(client, route, version, body)
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, entry.etag):
+            response_bytes_saved_total.inc(len(entry.body))
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=entry.body, media_type="application/json", headers=headers
+        )
+
+
+async def bump_campaigns_version(client) -> None:
+    """Invalidate cached campaign responses; call after every campaign write."""
+    await client.incr(CAMPAIGNS_VERSION_KEY)
+
+
+response_cache = ResponseCache(
+    maxsize=config.CAMPAIGN_RESPONSE_CACHE_SIZE,
+    ttl=config.CAMPAIGN_RESPONSE_CACHE_TTL,
+    shared=config.CAMPAIGN_RESPONSE_CACHE_SHARED,
+)
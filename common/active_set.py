@@ -0,0 +1,61 @@
+import heapq
+from typing import Iterable
+
+_END, _START = 0, 1
+
+
+class ActiveSet:
+    """
+    Ids of the campaigns live at the current time.
+
+    Start and end times of every campaign are pushed on a min-heap of
+    boundaries; `advance` pops only the boundaries that have passed, so keeping
+    the set current costs nothing between boundaries and O(log n) per
+    boundary crossed. Campaigns that reached their trigger cap are exhausted
+    and never reactivated.
+    """
+
+    def __init__(self, campaigns: Iterable, now: float):
+        self.active: set = set()
+        self.exhausted: set = set()
+        self._heap: list = []
+
+        for campaign in campaigns:
+            if campaign.ends_at is not None and campaign.ends_at <= now:
+                continue
+            if campaign.starts_at is None or campaign.starts_at <= now:
+                self.active.add(campaign.id)
+            else:
+                self._heap.append((campaign.starts_at, _START, campaign.id))
+            if campaign.ends_at is not None:
+                self._heap.append((campaign.ends_at, _END, campaign.id))
+        heapq.heapify(self._heap)
+
+    def __contains__(self, campaign_id: int) -> bool:
+        return campaign_id in self.active
+
+    def __len__(self) -> int:
+        return len(self.active)
+
+    def next_boundary(self) -> float:
+        return self._heap[0][0] if self._heap else float("inf")
+
+    def advance(self, now: float) -> bool:
+        """Apply every start/end boundary up to `now`; True if the set changed."""
+        changed = False
+        while self._heap and self._heap[0][0] <= now:
+            _, kind, campaign_id = heapq.heappop(self._heap)
+            if kind == _START and campaign_id not in self.exhausted:
+                self.active.add(campaign_id)
+            else:
+                self.active.discard(campaign_id)
+            changed = True
+        return changed
+
+    def exhaust(self, campaign_id: int) -> bool:
+        """Permanently deactivate a campaign. Returns True if it was active."""
+        self.exhausted.add(campaign_id)
+        if campaign_id in self.active:
+            self.active.discard(campaign_id)
+            return True
+        return False
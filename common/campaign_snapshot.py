@@ -0,0 +1,72 @@
+import json
+import sys
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence
+
+
+class CampaignSnapshot(NamedTuple):
+    """
+    The parts of a campaign the worker needs to match events.
+
+    Tuple-backed, so an instance carries no `__dict__`, ORM instance state or
+    timestamps. Treat `rules` as read-only: identical rules (and identical
+    sub-rules) are the same object across campaigns.
+    """
+
+    id: int
+    rules: Dict[str, Any]
+    starts_at: Optional[float] = None  # epoch seconds
+    ends_at: Optional[float] = None  # epoch seconds
+    max_triggers: Optional[int] = None
+
+
+def build_snapshot(rows: Iterable) -> tuple:
+    """
+    Build an immutable snapshot from campaign rows.
+
+    Identical rules and sub-rules are deduplicated to one shared object, and
+    keys and string values are interned, so thousands of campaigns built from
+    the same conditions share their memory.
+
+    Args:
+        rows: `(id, rules[, starts_at, ends_at, max_triggers])` rows from
+            `select(Campaign.id, Campaign.rules, ...)`
+
+    Returns:
+        Tuple of CampaignSnapshot
+    """
+    cache: Dict[str, Any] = {}
+    return tuple(
+        CampaignSnapshot(
+            row[0],
+            _intern(row[1], cache),
+            _epoch(_column(row, 2)),
+            _epoch(_column(row, 3)),
+            _column(row, 4),
+        )
+        for row in rows
+    )
+
+
+def _column(row: Sequence, index: int) -> Any:
+    return row[index] if len(row) > index else None
+
+
+def _epoch(value: Any) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+def _intern(value: Any, cache: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value)
+    if not isinstance(value, (dict, list)):
+        return value
+
+    key = json.dumps(value, sort_keys=True, default=str)
+    shared = cache.get(key)
+    if shared is None:
+        if isinstance(value, dict):
+            shared = {sys.intern(str(k)): _intern(v, cache) for k, v in value.items()}
+        else:
+            shared = [_intern(v, cache) for v in value]
+        cache[key] = shared
+    return shared
@@ -0,0 +1,87 @@
+import asyncio
+import math
+from typing import Optional
+
+from common.metrics import worker_concurrency_limit
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit that adapts to observed latency (additive increase,
+    multiplicative decrease).
+
+    Latency samples are judged in windows of `window` samples: if the
+    window's p99 is above `target_latency` or its error rate above
+    `max_error_rate`, the limit is multiplied by `backoff`; otherwise, if the
+    limit was actually reached during the window, it grows by one. The limit
+    stays within `[min_limit, max_limit]`.
+
+    Used as `async with limiter:` around each unit of work.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        window: int = 50,
+        backoff: float = 0.75,
+        max_error_rate: float = 0.05,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = min(max(initial, min_limit), self.max_limit)
+        self.target_latency = target_latency
+        self.window = window
+        self.backoff = backoff
+        self.max_error_rate = max_error_rate
+        self.in_flight = 0
+        self._latencies: list[float] = []
+        self._samples = 0
+        self._errors = 0
+        self._saturated = False
+        self._condition: Optional[asyncio.Condition] = None
+        worker_concurrency_limit.set(self.limit)
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def observe(self, latency: Optional[float], error: bool = False) -> None:
+        """Record one unit of work; `latency` is None for failures without a timing."""
+        self._samples += 1
+        self._errors += error
+        if latency is not None:
+            self._latencies.append(latency)
+        if self._samples < self.window:
+            return
+
+        latencies = sorted(self._latencies)
+        p99 = latencies[math.ceil(0.99 * len(latencies)) - 1] if latencies else 0.0
+        error_rate = self._errors / self._samples
+        if p99 > self.target_latency or error_rate > self.max_error_rate:
+            self.limit = max(self.min_limit, math.floor(self.limit * self.backoff))
+        elif self._saturated:
+            self.limit = min(self.max_limit, self.limit + 1)
+        worker_concurrency_limit.set(self.limit)
+
+        self._samples = self._errors = 0
+        self._latencies = []
+        self._saturated = self.in_flight >= self.limit
@@ -13,26 +13,153 @@ class Config:
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "postgres")
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
-    POSTGRES_PASSWORD: str = get_env_var("POSTGRES_PASSWORD", required=True)
+    # Required, but only checked when the database is first used so that
+    # tools and tests importing the config don't need DB secrets
+    POSTGRES_PASSWORD: Optional[str] = os.getenv("POSTGRES_PASSWORD")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    # Log every SQL statement; for debugging only, it costs a log record per query
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
 
     @property
     def database_url(self) -> str:
-        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        password = self.POSTGRES_PASSWORD or get_env_var(
+            "POSTGRES_PASSWORD", required=True
+        )
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{password}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
 
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+    # Events are spread over this many streams by hash of user_id; changing it
+    # on a live system moves users to other partitions (drain the streams first)
+    EVENT_PARTITIONS: int = int(os.getenv("EVENT_PARTITIONS", "8"))
+    # Seconds a worker keeps a partition without renewing its lease
+    PARTITION_LEASE_TTL: float = float(os.getenv("PARTITION_LEASE_TTL", "10"))
+
+    # Event publishing (API -> stream); concurrent publishes within the linger
+    # window are sent as one pipelined round trip
+    PUBLISH_LINGER_MS: float = float(os.getenv("PUBLISH_LINGER_MS", "1"))
+    PUBLISH_MAX_BATCH: int = int(os.getenv("PUBLISH_MAX_BATCH", "256"))
 
     # API
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
 
+    # Startup: connections opened before reporting ready (API /ready, worker ready file)
+    DB_WARM_CONNECTIONS: int = int(os.getenv("DB_WARM_CONNECTIONS", "2"))
+    REDIS_WARM_CONNECTIONS: int = int(os.getenv("REDIS_WARM_CONNECTIONS", "2"))
+    WORKER_READY_FILE: str = os.getenv("WORKER_READY_FILE", "/tmp/worker-ready")
+
+    # Worker Prometheus metrics are served on this port (0 disables)
+    WORKER_METRICS_PORT: int = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+
+    # Approximate cap on the dead-letter stream of failed events
+    DEAD_LETTER_MAX_LEN: int = int(os.getenv("DEAD_LETTER_MAX_LEN", "100000"))
+
+    # Admission control (backpressure on POST /events based on queue lag)
+    ADMISSION_HIGH_WATERMARK: int = int(os.getenv("ADMISSION_HIGH_WATERMARK", "10000"))
+    ADMISSION_PRIORITY_HIGH_WATERMARK: int = int(
+        os.getenv("ADMISSION_PRIORITY_HIGH_WATERMARK", "50000")
+    )
+    ADMISSION_PRIORITY_EVENT_TYPES: list[str] = [
+        t.strip()
+        for t in os.getenv("ADMISSION_PRIORITY_EVENT_TYPES", "purchase").split(",")
+        if t.strip()
+    ]
+    ADMISSION_LAG_PROBE_INTERVAL: float = float(
+        os.getenv("ADMISSION_LAG_PROBE_INTERVAL", "0.5")
+    )
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+
     # Worker
-    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "4"))  # initial limit
+    # Adaptive concurrency bounds and the p99 commit latency (seconds) it holds
+    WORKER_MIN_CONCURRENCY: int = int(os.getenv("WORKER_MIN_CONCURRENCY", "1"))
+    WORKER_MAX_CONCURRENCY: int = int(
+        os.getenv("WORKER_MAX_CONCURRENCY", str(WORKER_CONCURRENCY * 4))
+    )
+    WORKER_TARGET_COMMIT_LATENCY: float = float(
+        os.getenv("WORKER_TARGET_COMMIT_LATENCY", "0.05")
+    )
+    WORKER_LIMIT_WINDOW: int = int(os.getenv("WORKER_LIMIT_WINDOW", "50"))
+    # Stream entries read per concurrency slot (batch size = limit * this)
+    WORKER_BATCH_PER_SLOT: int = int(os.getenv("WORKER_BATCH_PER_SLOT", "25"))
+
+    # Bulk campaign import/export
+    CAMPAIGN_BULK_MAX: int = int(os.getenv("CAMPAIGN_BULK_MAX", "100000"))
+    CAMPAIGN_EXPORT_CHUNK: int = int(os.getenv("CAMPAIGN_EXPORT_CHUNK", "1000"))
+
+    # API cache of serialized campaign read responses, keyed by campaign-table
+    # version. SHARED also keeps the bodies in Redis so replicas share them.
+    CAMPAIGN_RESPONSE_CACHE_SIZE: int = int(
+        os.getenv("CAMPAIGN_RESPONSE_CACHE_SIZE", "1000")
+    )
+    CAMPAIGN_RESPONSE_CACHE_TTL: float = float(
+        os.getenv("CAMPAIGN_RESPONSE_CACHE_TTL", "30")
+    )
+    CAMPAIGN_RESPONSE_CACHE_SHARED: bool = (
+        os.getenv("CAMPAIGN_RESPONSE_CACHE_SHARED", "false").lower() == "true"
+    )
+
+    # Seconds between reloads of the compiled campaign rules in the worker
+    CAMPAIGN_CACHE_TTL: float = float(os.getenv("CAMPAIGN_CACHE_TTL", "5"))
+
+    # Sampled per-campaign rule profiling (0 disables); published to Redis for the
+    # admin report
+    RULE_PROFILE_SAMPLE_RATE: float = float(os.getenv("RULE_PROFILE_SAMPLE_RATE", "0"))
+    RULE_PROFILE_INTERVAL: float = float(os.getenv("RULE_PROFILE_INTERVAL", "30"))
+    # Stats age out after one to two windows; reports older than STALE_AFTER are dropped
+    RULE_PROFILE_WINDOW: float = float(os.getenv("RULE_PROFILE_WINDOW", "600"))
+    RULE_PROFILE_STALE_AFTER: float = float(
+        os.getenv("RULE_PROFILE_STALE_AFTER", "120")
+    )
+
+    # On-demand worker profiles (SIGUSR1: CPU, SIGUSR2: heap) are written here
+    DEBUG_PROFILE_DIR: str = os.getenv("DEBUG_PROFILE_DIR", "/tmp/campaign-profiles")
+    DEBUG_PROFILE_SECONDS: float = float(os.getenv("DEBUG_PROFILE_SECONDS", "30"))
+
+    # User profile enrichment for `user.*` rule fields (worker-side LRU)
+    PROFILE_CACHE_SIZE: int = int(os.getenv("PROFILE_CACHE_SIZE", "100000"))
+    PROFILE_CACHE_TTL: float = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+
+    # Windowed rule state (per-key counts/sums kept in the worker)
+    WINDOW_MAX_KEYS: int = int(os.getenv("WINDOW_MAX_KEYS", "100000"))
+    WINDOW_BUCKETS: int = int(os.getenv("WINDOW_BUCKETS", "60"))
+    WINDOW_CHECKPOINT_INTERVAL: float = float(
+        os.getenv("WINDOW_CHECKPOINT_INTERVAL", "30")
+    )
+
+    # Campaign trigger delivery (webhooks)
+    TRIGGER_WEBHOOK_URL: str = os.getenv("TRIGGER_WEBHOOK_URL", "")
+    # Per-campaign overrides, e.g. "12=http://crm/hook,15=http://mailer/hook"
+    TRIGGER_WEBHOOK_ROUTES: str = os.getenv("TRIGGER_WEBHOOK_ROUTES", "")
+    TRIGGER_BATCH_SIZE: int = int(os.getenv("TRIGGER_BATCH_SIZE", "100"))
+    TRIGGER_BATCH_LINGER_MS: int = int(os.getenv("TRIGGER_BATCH_LINGER_MS", "50"))
+    TRIGGER_SINK_CONCURRENCY: int = int(os.getenv("TRIGGER_SINK_CONCURRENCY", "4"))
+    TRIGGER_QUEUE_SIZE: int = int(os.getenv("TRIGGER_QUEUE_SIZE", "10000"))
+    TRIGGER_TIMEOUT: float = float(os.getenv("TRIGGER_TIMEOUT", "5"))
 
     # Security
     SECRET_KEY: str = get_env_var("SECRET_KEY", "your-secret-key-here-change-in-production", required=False)
 
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_CONFIG_PATH: str = os.getenv("LOG_CONFIG_PATH", "infra/logging/logging.json")
+    # Per-event loggers whose INFO/DEBUG records are sampled and rate limited
+    LOG_SAMPLED_LOGGERS: list[str] = [
+        name.strip()
+        for name in os.getenv(
+            "LOG_SAMPLED_LOGGERS",
+            "api.utils.publisher,worker.processor,worker.consumer",
+        ).split(",")
+        if name.strip()
+    ]
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    # Records per second per sampled logger
+    LOG_RATE_LIMIT: float = float(os.getenv("LOG_RATE_LIMIT", "100"))
 
 
 config = Config()
@@ -1,10 +1,28 @@
 # Redis queue names
-EVENTS_QUEUE = "events"
+EVENTS_QUEUE = "events"  # Redis stream key prefix; partition N is "events:N"
+EVENTS_CONSUMER_GROUP = "event-workers"
+PARTITION_LEASE_PREFIX = "events_lease:"  # per-partition lease, value = owning worker
+PARTITION_MEMBERS_KEY = "events_workers"  # sorted set of live workers by heartbeat time
+LEGACY_DRAIN_LOCK_KEY = "events_legacy_drain"  # held while draining the old stream
 
 # Campaign rule operators
-RULE_OPERATORS = ["equals", "greater_than", "less_than", "contains", "in", "between"]
+RULE_OPERATORS = [
+    "equals", "greater_than", "less_than", "contains", "in", "between",
+    "contains_any", "starts_with", "regex",
+]
+# Operators matching the text of a field value, whatever its type
+STRING_OPERATORS = ["contains", "contains_any", "starts_with", "regex"]
 LOGICAL_OPERATORS = ["and", "or", "not"]
-DEAD_LETTER_QUEUE = "dead_letter_queue"
+WINDOW_AGGREGATES = ["count", "sum"]
+DEAD_LETTER_QUEUE = "dead_letter_queue"  # Redis stream of events failing all retries
+WINDOW_CHECKPOINT_KEY = "rule_windows"  # Redis hash of windowed rule state
+RULE_PROFILE_KEY = "rule_profile"  # Redis hash of per-worker rule profiling stats
+RULE_PROFILE_TTL = 3600  # seconds a report outlives the last worker publishing it
+PROFILE_FIELD_PREFIX = "user."  # rule fields resolved from stored user profiles
+CAMPAIGNS_CHANGED_CHANNEL = "campaigns_changed"  # pub/sub: workers reload campaigns
+CAMPAIGNS_VERSION_KEY = "campaigns_version"  # bumped on every campaign write
+CAMPAIGN_RESPONSE_PREFIX = "campaign_response:"  # shared response cache entries
+CAMPAIGN_TRIGGER_COUNT_PREFIX = "campaign_trigger_count:"  # Redis counter per cap
 
 # Event types
 EVENT_TYPE_PURCHASE = "purchase"
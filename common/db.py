@@ -0,0 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from common.config import config
+
+
+class Database:
+    """
+    Async engine and session factory, created on first use.
+
+    Creating them lazily keeps imports free of DB secrets and lets each
+    service open (`warm`) its connections during startup instead of on the
+    first request or event.
+    """
+
+    def __init__(self):
+        self._engine: Optional[AsyncEngine] = None
+        self._sessionmaker = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(
+                config.database_url, echo=config.DB_ECHO, pool_size=config.DB_POOL_SIZE
+            )
+            self._sessionmaker = async_sessionmaker(
+                self._engine, class_=AsyncSession, expire_on_commit=False
+            )
+        return self._engine
+
+    @asynccontextmanager
+    async def session(self):
+        self.engine
+        async with self._sessionmaker() as session:
+            yield session
+
+    async def warm(self, connections: int) -> None:
+        """Open `connections` pooled connections now (at most the pool size)."""
+        async def ping():
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        count = min(connections, config.DB_POOL_SIZE)
+        await asyncio.gather(*(ping() for _ in range(count)))
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+
+
+def _collapse(frame) -> str:
+    """Render a frame's stack root-first as `file:function;file:function`."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """
+    Sample the stacks of all other threads for `seconds`.
+
+    Meant to run in its own thread (e.g. via `asyncio.to_thread`) so the event
+    loop keeps serving requests and shows up in the samples.
+
+    Returns:
+        Counter of collapsed stacks (root first, `;`-separated) to sample counts
+    """
+    own = threading.get_ident()
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own:
+                stacks[_collapse(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Collapsed-stack text accepted by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class HeapTracker:
+    """
+    Heap growth between snapshots, using `tracemalloc`.
+
+    The first snapshot starts tracing (tracemalloc has a memory and speed cost,
+    so it is only enabled once someone asks); each later one reports the
+    allocation sites that grew the most since the previous snapshot.
+    """
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self, top: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(self.frames)
+            current = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+            diff = []
+            if self._previous is not None:
+                for stat in current.compare_to(self._previous, "lineno")[:top]:
+                    frame = stat.traceback[0]
+                    diff.append({
+                        "location": f"{frame.filename}:{frame.lineno}",
+                        "size_diff": stat.size_diff,
+                        "size": stat.size,
+                        "count_diff": stat.count_diff,
+                    })
+            self._previous = current
+            size, peak = tracemalloc.get_traced_memory()
+            return {
+                "tracing_started": started,
+                "traced_bytes": size,
+                "peak_bytes": peak,
+                "diff": diff,
+            }
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+
+heap_tracker = HeapTracker()
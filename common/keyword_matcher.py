@@ -0,0 +1,87 @@
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Set
+
+# Below this many keywords per field, plain substring checks beat a Python
+# automaton walk
+AUTOMATON_THRESHOLD = 8
+
+
+class AhoCorasick:
+    """Finds every keyword occurring in a text in a single pass over the text."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: list[Dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[FrozenSet[str]] = [frozenset()]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(frozenset())
+                state = nxt
+            self._out[state] = self._out[state] | {keyword}
+
+        # Breadth-first so a state's failure target is finished before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] | self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> Set[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class KeywordIndex:
+    """
+    Lowercased substring needles registered per payload field.
+
+    All `contains`/`contains_any` conditions on a field, across every campaign,
+    are answered by one scan of that field's lowercased text.
+    """
+
+    def __init__(self) -> None:
+        self._needles: Dict[str, Set[str]] = {}
+        self._matchers: Dict[str, AhoCorasick] = {}
+
+    def add(self, field: str, needle: str) -> None:
+        self._needles.setdefault(field, set()).add(needle)
+
+    def build(self) -> None:
+        self._matchers = {
+            field: AhoCorasick(needle for needle in needles if needle)
+            for field, needles in self._needles.items()
+            if len(needles) >= AUTOMATON_THRESHOLD
+        }
+
+    def find(self, field: str, lowered_text: str) -> Set[str]:
+        """Return the registered needles for `field` that occur in the text."""
+        needles = self._needles.get(field, ())
+        matcher = self._matchers.get(field)
+        if matcher is None:
+            return {needle for needle in needles if needle in lowered_text}
+        found = matcher.find_all(lowered_text)
+        if "" in needles:
+            found.add("")
+        return found
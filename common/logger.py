@@ -1,6 +1,139 @@
+import atexit
+import json
 import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import random
+import time
 
 from logging import getLogger
 
+from common.metrics import log_records_dropped_total
+
+# Used when infra/logging/logging.json isn't shipped with the image
+DEFAULT_LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {
+            "class": "pythonjsonlogger.jsonlogger.JsonFormatter",
+            "format": "%(asctime)s %(name)s %(levelname)s %(message)s",
+        }
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "json",
+            "stream": "ext://sys.stdout",
+        }
+    },
+    "root": {"level": "INFO", "handlers": ["console"]},
+}
+
+_listeners: list[logging.handlers.QueueListener] = []
+
 def get_logger(name):
     return getLogger(name)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Sample and rate-limit a logger's records below WARNING.
+
+    Keeps a random `sample_rate` fraction of records, then at most
+    `rate_limit` records per second (token bucket, 0 disables the limit).
+    Warnings and errors always pass. Dropped records are never formatted.
+    """
+
+    def __init__(self, name: str, sample_rate: float = 1.0, rate_limit: float = 0.0):
+        super().__init__()
+        self.logger_name = name
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self._tokens = rate_limit
+        self._updated = time.monotonic()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            log_records_dropped_total.labels(logger=self.logger_name).inc()
+            return False
+        if self.rate_limit > 0:
+            now = time.monotonic()
+            refill = (now - self._updated) * self.rate_limit
+            self._tokens = min(self.rate_limit, self._tokens + refill)
+            self._updated = now
+            if self._tokens < 1:
+                log_records_dropped_total.labels(logger=self.logger_name).inc()
+                return False
+            self._tokens -= 1
+        return True
+
+
+def setup_logging(config_path=None):
+    """
+    Configure logging for the API and worker processes.
+
+    Loads the dictConfig JSON (LOG_CONFIG_PATH, infra/logging/logging.json by
+    default), applies LOG_LEVEL, then moves each logger's handlers behind a
+    QueueHandler so formatting and stream/file I/O run on a listener thread
+    instead of the event loop. Loggers listed in LOG_SAMPLED_LOGGERS get a
+    SamplingFilter for their per-event messages.
+    """
+    # Imported here so modules can use get_logger without loading the settings
+    from common.config import config
+
+    if _listeners:
+        return
+
+    path = config_path or config.LOG_CONFIG_PATH
+    try:
+        with open(path) as f:
+            log_config = json.load(f)
+    except FileNotFoundError:
+        log_config = DEFAULT_LOGGING
+
+    for handler in log_config.get("handlers", {}).values():
+        if "filename" in handler:
+            os.makedirs(os.path.dirname(handler["filename"]) or ".", exist_ok=True)
+    logging.config.dictConfig(log_config)
+
+    loggers = [logging.getLogger()] + [
+        logging.getLogger(name) for name in log_config.get("loggers", {}) if name
+    ]
+
+    # One queue and listener thread per distinct handler set, so routing
+    # (e.g. api/worker to console + file, everything else to console) is kept
+    queue_handlers: dict = {}
+    for logger in loggers:
+        logger.setLevel(config.LOG_LEVEL)
+        handlers = tuple(logger.handlers)
+        if not handlers:
+            continue
+        if handlers not in queue_handlers:
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(
+                log_queue, *handlers, respect_handler_level=True
+            )
+            listener.start()
+            _listeners.append(listener)
+            queue_handlers[handlers] = logging.handlers.QueueHandler(log_queue)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handlers[handlers])
+
+    for name in config.LOG_SAMPLED_LOGGERS:
+        getLogger(name).addFilter(
+            SamplingFilter(name, config.LOG_SAMPLE_RATE, config.LOG_RATE_LIMIT)
+        )
+
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener threads."""
+    while _listeners:
+        _listeners.pop().stop()
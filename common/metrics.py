@@ -16,6 +16,20 @@ campaigns_created_total = Counter(
     registry=registry
 )
 
+publish_latency_seconds = Histogram(
+    'campaign_api_publish_latency_seconds',
+    'Time from publish call to stream append confirmation',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    registry=registry
+)
+
+publish_batch_size = Histogram(
+    'campaign_api_publish_batch_size',
+    'Number of events appended per pipelined Redis round trip',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 256),
+    registry=registry
+)
+
 api_request_duration_seconds = Histogram(
     'campaign_api_request_duration_seconds',
     'API request duration in seconds',
@@ -49,6 +63,116 @@ idempotent_event_skips_total = Counter(
     registry=registry
 )
 
+worker_concurrency_limit = Gauge(
+    'campaign_worker_concurrency_limit',
+    'Current adaptive limit on events processed concurrently',
+    registry=registry
+)
+
+worker_commit_latency_seconds = Histogram(
+    'campaign_worker_commit_latency_seconds',
+    'Latency of the database commit that stores a processed event',
+    registry=registry
+)
+
+rule_nodes_shared = Gauge(
+    'campaign_worker_rule_nodes_shared',
+    'Rule nodes used by more than one place across compiled campaigns',
+    registry=registry
+)
+
+rule_node_evaluations = Histogram(
+    'campaign_worker_rule_node_evaluations',
+    'Shared rule nodes evaluated per event',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+    registry=registry
+)
+
+campaigns_active = Gauge(
+    'campaign_worker_campaigns_active',
+    'Campaigns inside their schedule and below their trigger cap',
+    registry=registry
+)
+
+campaign_cap_rejections_total = Counter(
+    'campaign_worker_campaign_cap_rejections_total',
+    'Matches dropped because the campaign had reached max_triggers',
+    registry=registry
+)
+
+profile_cache_hits_total = Counter(
+    'campaign_worker_profile_cache_hits_total',
+    'User profile lookups served from the worker cache',
+    registry=registry
+)
+
+profile_cache_misses_total = Counter(
+    'campaign_worker_profile_cache_misses_total',
+    'User profile lookups that had to be fetched from the database',
+    registry=registry
+)
+
+profile_fetch_seconds = Histogram(
+    'campaign_worker_profile_fetch_seconds',
+    'Latency of one bulk user profile query',
+    registry=registry
+)
+
+profile_enrichment_seconds = Histogram(
+    'campaign_worker_profile_enrichment_seconds',
+    'Time spent merging a cached user profile into an event payload',
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01),
+    registry=registry
+)
+
+rule_evaluation_seconds = Histogram(
+    'campaign_worker_rule_evaluation_seconds',
+    'Time to evaluate one campaign rule, on profiled (sampled) events',
+    buckets=(
+        0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05
+    ),
+    registry=registry
+)
+
+rule_evaluation_errors_total = Counter(
+    'campaign_worker_rule_evaluation_errors_total',
+    'Campaign rules that raised during evaluation, on profiled (sampled) events; '
+    'per campaign in GET /campaigns/profile',
+    registry=registry
+)
+
+rule_window_keys = Gauge(
+    'campaign_worker_rule_window_keys',
+    'Number of (window, key) pairs held for windowed rule operators',
+    registry=registry
+)
+
+rule_window_evictions_total = Counter(
+    'campaign_worker_rule_window_evictions_total',
+    'Windowed rule state entries dropped because their window expired',
+    registry=registry
+)
+
+trigger_notifications_total = Counter(
+    'campaign_worker_trigger_notifications_total',
+    'Campaign trigger notifications by delivery outcome',
+    ['status'],  # 'delivered', 'failed' or 'dropped'
+    registry=registry
+)
+
+trigger_batch_size = Histogram(
+    'campaign_worker_trigger_batch_size',
+    'Number of trigger notifications coalesced into one webhook request',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+    registry=registry
+)
+
+trigger_delivery_seconds = Histogram(
+    'campaign_worker_trigger_delivery_seconds',
+    'Webhook request latency for trigger batches',
+    registry=registry
+)
+
 # Queue Metrics
 events_in_queue = Gauge(
     'campaign_events_in_queue',
@@ -56,6 +180,45 @@ events_in_queue = Gauge(
     registry=registry
 )
 
+events_pending = Gauge(
+    'campaign_events_pending',
+    'Number of events delivered to workers but not yet acknowledged',
+    registry=registry
+)
+
+event_partitions = Gauge(
+    'campaign_event_partitions',
+    'Number of event stream partitions',
+    registry=registry
+)
+
+event_partition_lag = Gauge(
+    'campaign_event_partition_lag',
+    'Entries in one event stream partition (undelivered + unacknowledged)',
+    ['partition'],
+    registry=registry
+)
+
+worker_partitions_owned = Gauge(
+    'campaign_worker_partitions_owned',
+    'Event stream partitions this worker currently holds a lease on',
+    registry=registry
+)
+
+partition_rebalances_total = Counter(
+    'campaign_worker_partition_rebalances_total',
+    'Partitions acquired or released by this worker',
+    ['action'],  # 'acquired', 'released' or 'lost'
+    registry=registry
+)
+
+events_shed_total = Counter(
+    'campaign_api_events_shed_total',
+    'Events rejected with 429 by admission control',
+    ['lane'],  # 'priority' or 'default'
+    registry=registry
+)
+
 dead_letters_total = Counter(
     'campaign_dead_letters_total',
     'Total number of events sent to dead letter queue',
@@ -76,6 +239,20 @@ db_query_duration_seconds = Histogram(
     registry=registry
 )
 
+# API response cache
+response_cache_requests_total = Counter(
+    'campaign_response_cache_requests_total',
+    'Cacheable campaign reads by cache result',
+    ['result'],  # 'hit', 'miss', 'bypass'
+    registry=registry
+)
+
+response_bytes_saved_total = Counter(
+    'campaign_response_bytes_saved_total',
+    'Response body bytes not sent because the client ETag was current (304)',
+    registry=registry
+)
+
 # System Health
 service_up = Gauge(
     'campaign_service_up',
@@ -83,3 +260,33 @@ service_up = Gauge(
     ['service'],  # 'api', 'worker'
     registry=registry
 )
+
+# Startup
+startup_phase_seconds = Gauge(
+    'campaign_startup_phase_seconds',
+    'Duration of each startup phase; phase="total" is process start to ready',
+    ['service', 'phase'],
+    registry=registry
+)
+
+startup_ready = Gauge(
+    'campaign_startup_ready',
+    'Whether the service finished warming up and reports ready',
+    ['service'],
+    registry=registry
+)
+
+time_to_first_event_seconds = Gauge(
+    'campaign_time_to_first_event_seconds',
+    'Seconds from process start to the first event handled',
+    ['service'],
+    registry=registry
+)
+
+# Logging
+log_records_dropped_total = Counter(
+    'campaign_log_records_dropped_total',
+    'Log records dropped by sampling or rate limiting',
+    ['logger'],
+    registry=registry
+)
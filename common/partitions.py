@@ -0,0 +1,34 @@
+import zlib
+from typing import Any
+
+from common.constants import EVENTS_QUEUE
+
+
+def partition_for(user_id: Any, partitions: int) -> int:
+    """
+    Partition of a user's events.
+
+    Stable across processes and restarts (unlike `hash()`), so all events of a
+    user land in the same stream and are processed in order.
+    """
+    return zlib.crc32(str(user_id).encode("utf-8")) % partitions
+
+
+def stream_key(partition: int) -> str:
+    """Redis stream holding one partition of the events."""
+    return f"{EVENTS_QUEUE}:{partition}"
+
+
+def assign_partitions(members: list[str], partitions: int) -> dict[str, set[int]]:
+    """
+    Spread partitions round-robin over the sorted member names.
+
+    Every worker computes the same assignment from the same member list, so no
+    coordinator is needed; leases guard the hand-over while views differ.
+    """
+    members = sorted(members)
+    assignment: dict[str, set[int]] = {member: set() for member in members}
+    if members:
+        for partition in range(partitions):
+            assignment[members[partition % len(members)]].add(partition)
+    return assignment
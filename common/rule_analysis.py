@@ -0,0 +1,245 @@
+import re
+from typing import Any, Dict, Tuple
+
+from common.constants import RULE_OPERATORS
+from common.windows import WindowSpec
+
+# Relative cost of evaluating one condition, in units of an `equals` check.
+# `contains` stringifies and lowercases both sides; `in` scans the list.
+OPERATOR_COSTS = {
+    "equals": 1.0,
+    "greater_than": 1.0,
+    "less_than": 1.0,
+    "between": 1.5,
+    "in": 1.0,
+    "contains": 4.0,
+    "contains_any": 4.0,
+    "starts_with": 2.0,
+    "regex": 6.0,
+}
+IN_COST_PER_ITEM = 0.05
+NESTED_FIELD_COST = 0.5  # per extra dot-separated path segment
+WINDOW_COST = 3.0
+
+# Rough probability that a condition passes, used to order short-circuits
+OPERATOR_SELECTIVITY = {
+    "equals": 0.1,
+    "greater_than": 0.5,
+    "less_than": 0.5,
+    "between": 0.3,
+    "in": 0.2,
+    "contains": 0.2,
+    "contains_any": 0.3,
+    "starts_with": 0.2,
+    "regex": 0.2,
+}
+WINDOW_SELECTIVITY = 0.1
+
+CONDITION_KEYS = {"field", "operator", "value"}
+STRUCTURED_KEYS = {"and", "or", "not", "window"} | CONDITION_KEYS
+WINDOW_KEYS = {"aggregate", "key", "field", "seconds", "where", "operator", "value"}
+# Window state is held per event partition and events are partitioned by
+# user_id, so only windows over a user's own events see all of them
+WINDOW_KEY_FIELD = "user_id"
+# A normalized rule and its metadata
+Analysis = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+class RuleValidationError(ValueError):
+    """Raised when a campaign rule cannot be evaluated by the rule engine."""
+
+    def __init__(self, path: str, message: str):
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+
+def analyze_rule(rule: Any) -> Analysis:
+    """
+    Validate a campaign rule and produce an evaluation plan.
+
+    `and`/`or` children are reordered so the cheapest and most decisive checks
+    run first: for `and` by cost / (1 - pass probability), for `or` by
+    cost / pass probability. Reordering never changes the rule's result, only
+    how early evaluation short-circuits.
+
+    Args:
+        rule: Rule dictionary as submitted by the user
+
+    Returns:
+        Tuple of (optimized rule, plan tree with per-node cost and selectivity)
+
+    Raises:
+        RuleValidationError: If the rule uses unknown operators or keys
+    """
+    return _analyze(rule, "rules", in_window=False)
+
+
+def _analyze(rule: Any, path: str, in_window: bool) -> Analysis:
+    if not isinstance(rule, dict) or not rule:
+        raise RuleValidationError(path, "rule must be a non-empty object")
+
+    # Legacy shorthand {"event_type": "purchase"} means field equals value
+    if not STRUCTURED_KEYS & rule.keys():
+        if len(rule) != 1:
+            raise RuleValidationError(
+                path, "shorthand rules must have exactly one field"
+            )
+        (field, value), = rule.items()
+        rule = {"field": field, "operator": "equals", "value": value}
+
+    logical = [key for key in ("and", "or", "not", "window") if key in rule]
+    if len(logical) > 1 or (logical and CONDITION_KEYS & rule.keys()):
+        raise RuleValidationError(path, f"ambiguous rule with keys {sorted(rule)}")
+
+    if "and" in rule or "or" in rule:
+        return _analyze_logical(rule, path, in_window)
+    if "not" in rule:
+        _check_keys(rule, {"not"}, path)
+        child, child_plan = _analyze(rule["not"], f"{path}.not", in_window)
+        plan = {
+            "op": "not",
+            "cost": child_plan["cost"],
+            "selectivity": 1 - child_plan["selectivity"],
+            "children": [child_plan],
+        }
+        return {"not": child}, plan
+    if "window" in rule:
+        if in_window:
+            raise RuleValidationError(path, "windows cannot be nested")
+        return _analyze_window(rule, path)
+    return _analyze_condition(rule, path)
+
+
+def _analyze_logical(rule: Dict[str, Any], path: str, in_window: bool) -> Analysis:
+    op = "and" if "and" in rule else "or"
+    _check_keys(rule, {op}, path)
+    children = rule[op]
+    if not isinstance(children, list) or not children:
+        raise RuleValidationError(f"{path}.{op}", "must be a non-empty list")
+
+    analyzed = [
+        _analyze(child, f"{path}.{op}[{i}]", in_window)
+        for i, child in enumerate(children)
+    ]
+
+    def rank(item: Analysis) -> float:
+        cost, selectivity = item[1]["cost"], item[1]["selectivity"]
+        decisive = 1 - selectivity if op == "and" else selectivity
+        return cost / max(decisive, 1e-6)
+
+    analyzed.sort(key=rank)
+
+    # Expected cost with short-circuiting: a child only runs if all earlier
+    # children passed (and) or failed (or)
+    cost = 0.0
+    reach = 1.0
+    selectivity = 1.0 if op == "and" else 0.0
+    for _, child_plan in analyzed:
+        cost += reach * child_plan["cost"]
+        if op == "and":
+            reach *= child_plan["selectivity"]
+            selectivity *= child_plan["selectivity"]
+        else:
+            reach *= 1 - child_plan["selectivity"]
+    if op == "or":
+        selectivity = 1 - reach
+
+    plan = {
+        "op": op,
+        "cost": round(cost, 3),
+        "selectivity": round(selectivity, 3),
+        "children": [child_plan for _, child_plan in analyzed],
+    }
+    return {op: [child for child, _ in analyzed]}, plan
+
+
+def _analyze_window(rule: Dict[str, Any], path: str) -> Analysis:
+    _check_keys(rule, {"window"}, path)
+    window = rule["window"]
+    if not isinstance(window, dict):
+        raise RuleValidationError(f"{path}.window", "must be an object")
+    _check_keys(window, WINDOW_KEYS, f"{path}.window")
+    try:
+        spec = WindowSpec(window)
+    except ValueError as e:
+        raise RuleValidationError(f"{path}.window", str(e))
+    if spec.key != WINDOW_KEY_FIELD:
+        raise RuleValidationError(
+            f"{path}.window.key",
+            f"must be '{WINDOW_KEY_FIELD}': windows are kept per user partition",
+        )
+    _check_operator(window.get("operator"), window.get("value"), f"{path}.window")
+    if spec.where is not None:
+        where, _ = _analyze(spec.where, f"{path}.window.where", in_window=True)
+        rule = {"window": {**window, "where": where}}
+
+    plan = {
+        "op": "window",
+        "aggregate": spec.aggregate,
+        "key": spec.key,
+        "operator": window["operator"],
+        "cost": WINDOW_COST,
+        "selectivity": WINDOW_SELECTIVITY,
+    }
+    return rule, plan
+
+
+def _analyze_condition(rule: Dict[str, Any], path: str) -> Analysis:
+    _check_keys(rule, CONDITION_KEYS, path)
+    missing = CONDITION_KEYS - rule.keys()
+    if missing:
+        raise RuleValidationError(path, f"missing {', '.join(sorted(missing))}")
+
+    field, operator, value = rule["field"], rule["operator"], rule["value"]
+    if not isinstance(field, str) or not field or "" in field.split("."):
+        raise RuleValidationError(f"{path}.field", f"invalid field path {field!r}")
+    _check_operator(operator, value, path)
+
+    cost = OPERATOR_COSTS[operator] + NESTED_FIELD_COST * field.count(".")
+    selectivity = OPERATOR_SELECTIVITY[operator]
+    if operator in ("in", "contains_any"):
+        cost += IN_COST_PER_ITEM * len(value)
+    if operator == "in":
+        selectivity = min(0.9, selectivity * len(value) / 2)
+
+    plan = {
+        "field": field,
+        "operator": operator,
+        "cost": round(cost, 3),
+        "selectivity": round(selectivity, 3),
+    }
+    return rule, plan
+
+
+def _check_operator(operator: Any, value: Any, path: str) -> None:
+    if operator not in RULE_OPERATORS:
+        raise RuleValidationError(
+            f"{path}.operator", f"unsupported operator {operator!r}"
+        )
+    if operator == "in" and not isinstance(value, list):
+        raise RuleValidationError(f"{path}.value", "'in' requires a list")
+    if operator == "between" and not (isinstance(value, list) and len(value) == 2):
+        raise RuleValidationError(
+            f"{path}.value", "'between' requires a [low, high] list"
+        )
+    if operator == "contains_any" and not (
+        isinstance(value, list)
+        and value
+        and all(isinstance(v, (str, int, float)) for v in value)
+    ):
+        raise RuleValidationError(
+            f"{path}.value", "'contains_any' requires a non-empty list of strings"
+        )
+    if operator in ("starts_with", "regex") and not isinstance(value, str):
+        raise RuleValidationError(f"{path}.value", f"'{operator}' requires a string")
+    if operator == "regex":
+        try:
+            re.compile(value)
+        except re.error as e:
+            raise RuleValidationError(f"{path}.value", f"invalid regex: {e}")
+
+
+def _check_keys(rule: Dict[str, Any], allowed: set, path: str) -> None:
+    unknown = rule.keys() - allowed
+    if unknown:
+        raise RuleValidationError(path, f"unknown keys {sorted(unknown)}")
@@ -0,0 +1,344 @@
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from common.keyword_matcher import KeywordIndex
+from common.logger import get_logger
+from common.metrics import rule_node_evaluations
+from common.rule_analysis import RuleValidationError, analyze_rule
+from common.rule_profiler import RuleProfiler
+from common.rule_engine import (
+    apply_operator,
+    collect_window_specs,
+    compiled_pattern,
+    get_nested_value,
+    lowered,
+)
+from common.windows import window_id
+
+logger = get_logger(__name__)
+
+
+class EventContext:
+    """Per-event memo of node results and field lookups shared by all compiled rules."""
+
+    __slots__ = (
+        "payload",
+        "windows",
+        "keywords",
+        "evaluations",
+        "_nodes",
+        "_results",
+        "_lowered",
+        "_hits",
+    )
+
+    def __init__(
+        self,
+        payload: Dict[str, Any],
+        windows: Optional[Dict[str, float]],
+        keywords: KeywordIndex,
+        nodes: list,
+    ):
+        self.payload = payload
+        self.windows = windows
+        self.keywords = keywords
+        self.evaluations = 0
+        self._nodes = nodes
+        self._results: list[Optional[bool]] = [None] * len(nodes)
+        self._lowered: Dict[str, Optional[str]] = {}
+        self._hits: Dict[str, Set[str]] = {}
+
+    def evaluate(self, index: int) -> bool:
+        """Result of shared node `index`, evaluated at most once per event."""
+        result = self._results[index]
+        if result is None:
+            result = self._nodes[index](self)
+            self._results[index] = result
+            self.evaluations += 1
+        return result
+
+    def lowered(self, field: str) -> Optional[str]:
+        """Lowercased string form of a payload field, computed once per event."""
+        try:
+            return self._lowered[field]
+        except KeyError:
+            value = get_nested_value(self.payload, field)
+            text = None if value is None else str(value).lower()
+            self._lowered[field] = text
+            return text
+
+    def keyword_hits(self, field: str) -> Set[str]:
+        """Needles registered for `field` that occur in its value, found in one scan."""
+        try:
+            return self._hits[field]
+        except KeyError:
+            text = self.lowered(field)
+            hits = set() if text is None else self.keywords.find(field, text)
+            self._hits[field] = hits
+            return hits
+
+
+Node = Callable[[EventContext], bool]
+
+
+class CompiledRuleSet:
+    """
+    Campaign rules compiled once and matched against many events.
+
+    Rules are validated and reordered with `analyze_rule`, then turned into
+    closures with their constants prepared up front: lowercased needles,
+    compiled regexes and frozensets for `in`. Every `contains`/`contains_any`
+    needle is registered in a per-field keyword index so an event's field is
+    scanned once for all campaigns. Campaigns whose rules fail validation are
+    skipped (and reported in `invalid`) instead of failing on every event.
+
+    Nodes (conditions, windows and whole sub-rules) that occur more than once
+    across all campaigns are interned into one shared node table. Campaign
+    rules reference table entries, and each entry is evaluated lazily, at most
+    once per event, so repeated conditions cost one evaluation per event no
+    matter how many campaigns use them. Nodes used only once are called
+    directly to avoid the memo overhead.
+    """
+
+    def __init__(self, campaigns):
+        self.keywords = KeywordIndex()
+        self.rules: list[tuple[int, Node]] = []
+        self.invalid: Dict[int, str] = {}
+        self._nodes: list[Node] = []
+        self._node_index: Dict[str, int] = {}
+        self._refs: list[Node] = []
+        self._uses: Dict[str, int] = {}
+        self._fields: Dict[int, Set[str]] = {}
+
+        valid = []
+        analyzed = []
+        # Snapshots share identical rule objects, so analyze each one once
+        optimized: Dict[int, Any] = {}
+        for campaign in campaigns:
+            rule = optimized.get(id(campaign.rules))
+            if rule is None:
+                try:
+                    rule = analyze_rule(campaign.rules)[0]
+                except RuleValidationError as e:
+                    rule = e
+                optimized[id(campaign.rules)] = rule
+            if isinstance(rule, RuleValidationError):
+                self.invalid[campaign.id] = str(rule)
+                logger.warning(
+                    f"Skipping campaign {campaign.id} with invalid rules: {rule}"
+                )
+                continue
+            valid.append(campaign)
+            analyzed.append((campaign.id, rule))
+            self._count_uses(rule)
+            self._fields[campaign.id] = self._referenced_fields(rule)
+
+        for campaign_id, rule in analyzed:
+            self.rules.append((campaign_id, self._compile(rule)))
+        self._all_rules = self.rules
+        self.fields = set().union(*self._fields.values())
+        del self._uses
+
+        self.keywords.build()
+        self.window_specs = collect_window_specs(valid)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @property
+    def shared_nodes(self) -> int:
+        return len(self._nodes)
+
+    def set_active(self, campaign_ids) -> None:
+        """Restrict matching to `campaign_ids` without recompiling anything."""
+        self.rules = [
+            (campaign_id, node)
+            for campaign_id, node in self._all_rules
+            if campaign_id in campaign_ids
+        ]
+        active_fields = (self._fields[campaign_id] for campaign_id, _ in self.rules)
+        self.fields = set().union(*active_fields)
+
+    def match(
+        self,
+        payload: Dict[str, Any],
+        windows: Optional[Dict[str, float]] = None,
+        profiler: Optional[RuleProfiler] = None,
+    ) -> list[int]:
+        """Return the ids of campaigns whose rules match the payload."""
+        ctx = EventContext(payload, windows, self.keywords, self._nodes)
+        sampled = profiler if profiler is not None and profiler.sample() else None
+        matches = []
+        for campaign_id, node in self.rules:
+            if sampled is not None:
+                start = time.perf_counter()
+            matched = error = False
+            try:
+                matched = node(ctx)
+            except Exception as e:
+                # Log error but don't fail processing
+                error = True
+                logger.warning("Error evaluating campaign %s: %s", campaign_id, e)
+            if matched:
+                matches.append(campaign_id)
+            if sampled is not None:
+                elapsed = time.perf_counter() - start
+                sampled.record(campaign_id, elapsed, matched, error)
+        rule_node_evaluations.observe(ctx.evaluations)
+        return matches
+
+    @staticmethod
+    def _key(rule: Dict[str, Any]) -> str:
+        return json.dumps(rule, sort_keys=True, default=str)
+
+    @classmethod
+    def _referenced_fields(cls, rule: Dict[str, Any]) -> Set[str]:
+        """Payload fields read by a rule, including window keys and filters."""
+        if "field" in rule:
+            return {rule["field"]}
+        if "window" in rule:
+            window = rule["window"]
+            window_fields = {window["key"]}
+            if window.get("field"):
+                window_fields.add(window["field"])
+            if isinstance(window.get("where"), dict):
+                window_fields |= cls._referenced_fields(window["where"])
+            return window_fields
+        fields: Set[str] = set()
+        for key, value in rule.items():
+            if key in ("and", "or"):
+                for child in value:
+                    fields |= cls._referenced_fields(child)
+            elif key == "not":
+                fields |= cls._referenced_fields(value)
+            else:
+                fields.add(key)  # legacy {"field": value} shorthand in window filters
+        return fields
+
+    def _count_uses(self, rule: Dict[str, Any]) -> None:
+        key = self._key(rule)
+        self._uses[key] = self._uses.get(key, 0) + 1
+        if self._uses[key] > 1:
+            return  # Children were already counted with the first occurrence
+        for op in ("and", "or"):
+            for child in rule.get(op, []):
+                self._count_uses(child)
+        if "not" in rule:
+            self._count_uses(rule["not"])
+
+    def _compile(self, rule: Dict[str, Any]) -> Node:
+        """Return a reference to the shared node for `rule`, compiling it if new."""
+        key = self._key(rule)
+        if self._uses[key] == 1:
+            return self._compile_node(rule)
+
+        index = self._node_index.get(key)
+        if index is None:
+            node = self._compile_node(rule)
+            index = len(self._nodes)
+            self._nodes.append(node)
+            self._node_index[key] = index
+
+            def ref(ctx: EventContext, index: int = index) -> bool:
+                return ctx.evaluate(index)
+
+            self._refs.append(ref)
+        return self._refs[index]
+
+    def _compile_node(self, rule: Dict[str, Any]) -> Node:
+        if "and" in rule:
+            children = [self._compile(child) for child in rule["and"]]
+            return lambda ctx: all(child(ctx) for child in children)
+        if "or" in rule:
+            children = [self._compile(child) for child in rule["or"]]
+            return lambda ctx: any(child(ctx) for child in children)
+        if "not" in rule:
+            child = self._compile(rule["not"])
+            return lambda ctx: not child(ctx)
+        if "window" in rule:
+            return self._compile_window(rule["window"])
+        return self._compile_condition(rule["field"], rule["operator"], rule["value"])
+
+    def _compile_window(self, window: Dict[str, Any]) -> Node:
+        spec_id = window_id(window)
+        operator = window["operator"]
+        value: Any = window.get("value")
+
+        def evaluate(ctx: EventContext) -> bool:
+            if ctx.windows is None or spec_id not in ctx.windows:
+                return False
+            return apply_operator(ctx.windows[spec_id], operator, value)
+
+        return evaluate
+
+    def _compile_condition(self, field: str, operator: str, value: Any) -> Node:
+        compile_operator = self._CONDITION_COMPILERS.get(operator)
+        node = compile_operator(self, field, value) if compile_operator else None
+        if node is not None:
+            return node
+
+        def condition(ctx: EventContext) -> bool:
+            field_value = get_nested_value(ctx.payload, field)
+            if field_value is None:
+                return False
+            return apply_operator(field_value, operator, value)
+
+        return condition
+
+    def _compile_contains(self, field: str, value: Any) -> Node:
+        needle = lowered(value)
+        self.keywords.add(field, needle)
+        return lambda ctx: needle in ctx.keyword_hits(field)
+
+    def _compile_contains_any(self, field: str, value: Any) -> Node:
+        needles = frozenset(lowered(v) for v in value)
+        for needle in needles:
+            self.keywords.add(field, needle)
+        return lambda ctx: not needles.isdisjoint(ctx.keyword_hits(field))
+
+    def _compile_starts_with(self, field: str, value: Any) -> Node:
+        prefix = lowered(value)
+
+        def starts_with(ctx: EventContext) -> bool:
+            text = ctx.lowered(field)
+            return text is not None and text.startswith(prefix)
+
+        return starts_with
+
+    def _compile_regex(self, field: str, value: Any) -> Node:
+        pattern = compiled_pattern(value)
+
+        def regex(ctx: EventContext) -> bool:
+            field_value = get_nested_value(ctx.payload, field)
+            if field_value is None:
+                return False
+            return pattern.search(str(field_value)) is not None
+
+        return regex
+
+    def _compile_in(self, field: str, value: Any) -> Optional[Node]:
+        try:
+            members = frozenset(value)
+        except TypeError:
+            return None  # unhashable members: fall back to the generic condition
+
+        def in_set(ctx: EventContext) -> bool:
+            field_value = get_nested_value(ctx.payload, field)
+            if field_value is None:
+                return False
+            try:
+                return field_value in members
+            except TypeError:  # unhashable payload value
+                return field_value in value
+
+        return in_set
+
+    # Operators with a specialised node; the rest use `apply_operator`
+    _CONDITION_COMPILERS = {
+        "contains": _compile_contains,
+        "contains_any": _compile_contains_any,
+        "starts_with": _compile_starts_with,
+        "regex": _compile_regex,
+        "in": _compile_in,
+    }
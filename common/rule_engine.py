@@ -1,6 +1,13 @@
 import operator
-from typing import Any, Dict, Union
-from common.constants import RULE_OPERATORS, LOGICAL_OPERATORS
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+from common.constants import RULE_OPERATORS, LOGICAL_OPERATORS, STRING_OPERATORS
+from common.logger import get_logger
+from common.windows import SlidingWindowStore, WindowSpec, window_id
+
+logger = get_logger(__name__)
 
 def evaluate_condition(payload: Dict[str, Any], field: str, operator: str, value: Union[str, int, float, list]) -> bool:
     """
@@ -23,9 +30,32 @@ def evaluate_condition(payload: Dict[str, Any], field: str, operator: str, value
     if field_value is None:
         return False
 
-    # Convert value to match field_value type if possible
+    return apply_operator(field_value, operator, value)
+
+
+def apply_operator(
+    field_value: Any, operator: str, value: Union[str, int, float, list]
+) -> bool:
+    """
+    Compare a resolved field value against the rule value.
+
+    Args:
+        field_value: Value taken from the payload (or a window aggregate)
+        operator: Comparison operator
+        value: Value to compare against
+
+    Returns:
+        Boolean result of the comparison
+    """
+    # Convert value to match field_value type if possible. String operators
+    # keep the rule value's own text ("2" is in 2.5, "2.0" is not), as the
+    # compiled rules do
     expected_type = type(field_value)
-    if not isinstance(value, type(field_value)) and expected_type in [int, float]:
+    if (
+        operator not in STRING_OPERATORS
+        and not isinstance(value, expected_type)
+        and expected_type in [int, float]
+    ):
         try:
             value = expected_type(value)
         except (ValueError, TypeError):
@@ -39,7 +69,16 @@ def evaluate_condition(payload: Dict[str, Any], field: str, operator: str, value
     elif operator == "less_than":
         return field_value < value
     elif operator == "contains":
-        return str(value).lower() in str(field_value).lower()
+        return lowered(value) in str(field_value).lower()
+    elif operator == "contains_any":
+        if not isinstance(value, list):
+            return False
+        text = str(field_value).lower()
+        return any(needle in text for needle in lowered_keywords(tuple(value)))
+    elif operator == "starts_with":
+        return str(field_value).lower().startswith(lowered(value))
+    elif operator == "regex":
+        return compiled_pattern(str(value)).search(str(field_value)) is not None
     elif operator == "in":
         return field_value in value
     elif operator == "between":
@@ -49,25 +88,62 @@ def evaluate_condition(payload: Dict[str, Any], field: str, operator: str, value
     else:
         return False
 
-def evaluate_rule(payload: Dict[str, Any], rule: Dict[str, Any]) -> bool:
+def lowered(value: Any) -> str:
+    """Lowercased string form of a rule value, computed once per distinct value."""
+    if isinstance(value, (str, int, float)):
+        return _lowered(value)
+    return str(value).lower()
+
+# typed: True, 1 and 1.0 are equal keys but lower to "true", "1" and "1.0"
+@lru_cache(maxsize=4096, typed=True)
+def _lowered(value: Union[str, int, float]) -> str:
+    return str(value).lower()
+
+def lowered_keywords(values: tuple) -> tuple:
+    # Not cached as a whole: (True,) and (1,) would share an entry
+    return tuple(lowered(v) for v in values)
+
+@lru_cache(maxsize=1024)
+def compiled_pattern(pattern: str) -> "re.Pattern[str]":
+    return re.compile(pattern)
+
+
+def evaluate_rule(
+    payload: Dict[str, Any],
+    rule: Dict[str, Any],
+    windows: Optional[Dict[str, float]] = None,
+) -> bool:
     """
     Evaluate a complete rule which may include logical operators.
 
     Args:
         payload: Event payload
         rule: Rule dictionary structure
+        windows: Window aggregates for this event, from `plan_windows`
 
     Returns:
         Boolean result of the rule
     """
     if "and" in rule:
-        return all(evaluate_rule(payload, subrule) for subrule in rule["and"])
+        return all(evaluate_rule(payload, subrule, windows) for subrule in rule["and"])
 
     if "or" in rule:
-        return any(evaluate_rule(payload, subrule) for subrule in rule["or"])
+        return any(evaluate_rule(payload, subrule, windows) for subrule in rule["or"])
 
     if "not" in rule:
-        return not evaluate_rule(payload, rule["not"])
+        return not evaluate_rule(payload, rule["not"], windows)
+
+    # Windowed aggregate, e.g. purchases by this user in the last 24h
+    if "window" in rule:
+        window = rule["window"]
+        if windows is None:
+            return False
+        aggregate = windows.get(window_id(window))
+        if aggregate is None:
+            return False
+        if window.get("operator") not in RULE_OPERATORS:
+            raise ValueError(f"Unsupported operator: {window.get('operator')}")
+        return apply_operator(aggregate, window["operator"], window.get("value"))
 
     # Single condition rule
     if all(key in rule for key in ["field", "operator", "value"]):
@@ -75,26 +151,40 @@ def evaluate_rule(payload: Dict[str, Any], rule: Dict[str, Any]) -> bool:
 
     return False
 
-def match_campaigns_enhanced(payload: Dict[str, Any], campaigns) -> list[int]:
+def match_campaigns_enhanced(
+    payload: Dict[str, Any],
+    campaigns,
+    windows: Optional[Dict[str, float]] = None,
+    profiler=None,
+) -> list[int]:
     """
     Enhanced campaign matching with complex rule evaluation.
 
     Args:
         payload: Event payload
         campaigns: List of campaign objects with rules
+        windows: Window aggregates for this event, from `plan_windows`
+        profiler: Optional RuleProfiler; sampled events are timed per campaign
 
     Returns:
         List of matching campaign IDs
     """
+    timed = profiler is not None and profiler.sample()
     matches = []
     for campaign in campaigns:
+        if timed:
+            start = time.perf_counter()
+        matched = error = False
         try:
-            if evaluate_rule(payload, campaign.rules):
-                matches.append(campaign.id)
+            matched = evaluate_rule(payload, campaign.rules, windows)
         except Exception as e:
             # Log error but don't fail processing
-            print(f"Error evaluating campaign {campaign.id}: {e}")
-            continue
+            error = True
+            logger.warning("Error evaluating campaign %s: %s", campaign.id, e)
+        if matched:
+            matches.append(campaign.id)
+        if timed:
+            profiler.record(campaign.id, time.perf_counter() - start, matched, error)
     return matches
 
 def get_nested_value(d: Dict[str, Any], key: str) -> Any:
@@ -115,3 +205,111 @@ def get_nested_value(d: Dict[str, Any], key: str) -> Any:
         else:
             return None
     return d
+
+def collect_window_specs(campaigns) -> list[WindowSpec]:
+    """
+    Collect the distinct window definitions used by a set of campaigns.
+
+    Args:
+        campaigns: List of campaign objects with rules
+
+    Returns:
+        One WindowSpec per distinct window, shared by all campaigns using it
+    """
+    specs: Dict[str, WindowSpec] = {}
+
+    def visit(rule: Any) -> None:
+        if not isinstance(rule, dict):
+            return
+        for key in ("and", "or"):
+            for subrule in rule.get(key, []):
+                visit(subrule)
+        if "not" in rule:
+            visit(rule["not"])
+        if "window" in rule:
+            spec = WindowSpec(rule["window"])
+            specs.setdefault(spec.id, spec)
+
+    for campaign in campaigns:
+        try:
+            visit(campaign.rules)
+        except ValueError as e:
+            logger.warning("Invalid window in campaign %s: %s", campaign.id, e)
+    return list(specs.values())
+
+def plan_windows(
+    payload: Dict[str, Any],
+    specs: list[WindowSpec],
+    store: SlidingWindowStore,
+    now: Optional[float] = None,
+) -> tuple[Dict[str, float], list[tuple[WindowSpec, Any, float]]]:
+    """
+    Read the window aggregates as they will be once the event is recorded,
+    without changing the store.
+
+    The event belongs to a window when its key field is present and it matches
+    the window's `where` rule, independently of how campaign rules short-circuit.
+    Windows it does not belong to report their current aggregate for the
+    event's key. Pass the returned additions to `record_windows` once the event
+    is stored, so a failed and retried event is not counted twice.
+
+    Args:
+        payload: Event payload
+        specs: Window definitions from `collect_window_specs`
+        store: State store holding the windows
+        now: Event time in epoch seconds (defaults to the current time)
+
+    Returns:
+        Tuple of (aggregate by window id, to pass to `evaluate_rule`;
+        (spec, key value, amount) additions for `record_windows`)
+    """
+    values: Dict[str, float] = {}
+    additions: list[tuple[WindowSpec, Any, float]] = []
+    for spec in specs:
+        key_value = get_nested_value(payload, spec.key)
+        if key_value is None:
+            continue
+        if spec.where is not None and not evaluate_rule(payload, spec.where):
+            values[spec.id] = store.current(spec, key_value, now)
+            continue
+
+        amount = 1
+        if spec.aggregate == "sum":
+            # WindowSpec requires `field` for sums
+            amount = get_nested_value(payload, spec.field) if spec.field else 0
+            if not isinstance(amount, (int, float)):
+                amount = 0
+        values[spec.id] = store.current(spec, key_value, now) + amount
+        additions.append((spec, key_value, amount))
+    return values, additions
+
+def record_windows(
+    additions: list[tuple[WindowSpec, Any, float]],
+    store: SlidingWindowStore,
+    now: Optional[float] = None,
+) -> None:
+    """Add an event to the windows `plan_windows` found it belongs to."""
+    for spec, key_value, amount in additions:
+        store.add(spec, key_value, amount, now)
+
+def update_windows(
+    payload: Dict[str, Any],
+    specs: list[WindowSpec],
+    store: SlidingWindowStore,
+    now: Optional[float] = None,
+) -> Dict[str, float]:
+    """
+    Record an event in every window it belongs to and read back the aggregates.
+
+    Args:
+        payload: Event payload
+        specs: Window definitions from `collect_window_specs`
+        store: State store holding the windows
+        now: Event time in epoch seconds (defaults to the current time)
+
+    Returns:
+        Aggregate by window id, to pass to `evaluate_rule`
+    """
+    values, additions = plan_windows(payload, specs, store, now)
+    record_windows(additions, store, now)
+    return values
@@ -0,0 +1,154 @@
+import json
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from common.metrics import rule_evaluation_errors_total, rule_evaluation_seconds
+
+# Fields of a per-campaign stats entry
+SAMPLES, SECONDS, MAX_SECONDS, MATCHES, ERRORS = range(5)
+
+PROFILE_SORT_KEYS = ("mean", "total", "max", "errors", "match_rate")
+
+
+class RuleProfiler:
+    """
+    Sampled per-campaign timing of rule evaluation.
+
+    For a `sample_rate` fraction of events every campaign's rule is timed on
+    its own, and the evaluation time, whether it matched and whether it raised
+    are accumulated per campaign. Unsampled events only pay for one random
+    draw. Rule nodes shared between campaigns are evaluated once per event, so
+    their cost is attributed to the first campaign that needed them.
+
+    Stats are kept per `window` seconds; `report` covers the current and the
+    previous window, so deleted or changed campaigns age out of it.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        rng: Callable[[], float] = random.random,
+        window: float = 600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sample_rate = sample_rate
+        self.window = window
+        self._rng = rng
+        self._clock = clock
+        self.stats: Dict[int, list] = {}  # current window
+        self._previous: Dict[int, list] = {}
+        self._window_start = clock()
+
+    def sample(self) -> bool:
+        """Decide whether the current event is profiled."""
+        return self.sample_rate > 0 and self._rng() < self.sample_rate
+
+    def record(
+        self, campaign_id: int, seconds: float, matched: bool, error: bool = False
+    ) -> None:
+        entry = self.stats.get(campaign_id)
+        if entry is None:
+            entry = self.stats[campaign_id] = [0, 0.0, 0.0, 0, 0]
+        entry[SAMPLES] += 1
+        entry[SECONDS] += seconds
+        entry[MAX_SECONDS] = max(entry[MAX_SECONDS], seconds)
+        entry[MATCHES] += matched
+        entry[ERRORS] += error
+        rule_evaluation_seconds.observe(seconds)
+        if error:
+            rule_evaluation_errors_total.inc()
+
+    def report(self) -> Dict[int, list]:
+        """Stats of the current and previous window, merged."""
+        elapsed = self._clock() - self._window_start
+        if elapsed >= self.window:
+            # Nothing recorded for two windows leaves nothing to report
+            self._previous = self.stats if elapsed < 2 * self.window else {}
+            self.stats = {}
+            self._window_start = self._clock()
+        return merge_stats([self._previous, self.stats])
+
+    def reset(self) -> None:
+        self.stats = {}
+        self._previous = {}
+        self._window_start = self._clock()
+
+
+def merge_stats(reports: Iterable[Dict[Any, list]]) -> Dict[int, list]:
+    """Combine `RuleProfiler.stats` from several workers."""
+    merged: Dict[int, list] = {}
+    for stats in reports:
+        for campaign_id, entry in stats.items():
+            total = merged.setdefault(int(campaign_id), [0, 0.0, 0.0, 0, 0])
+            total[SAMPLES] += entry[SAMPLES]
+            total[SECONDS] += entry[SECONDS]
+            total[MAX_SECONDS] = max(total[MAX_SECONDS], entry[MAX_SECONDS])
+            total[MATCHES] += entry[MATCHES]
+            total[ERRORS] += entry[ERRORS]
+    return merged
+
+
+def live_reports(
+    raw: Dict[Any, Any], now: float, max_age: float
+) -> tuple[list[Dict[Any, list]], list]:
+    """
+    Split the published per-worker reports into live and stale ones.
+
+    Args:
+        raw: The RULE_PROFILE_KEY hash, worker name -> `{"at": epoch, "stats": ...}`
+        now: Current epoch time
+        max_age: Reports published longer ago than this belong to dead workers
+
+    Returns:
+        (stats of live workers, hash fields of stale or unreadable reports)
+    """
+    live, stale = [], []
+    for field, value in raw.items():
+        try:
+            report = json.loads(value)
+        except ValueError:
+            report = None
+        if (
+            isinstance(report, dict)
+            and "stats" in report
+            and now - report.get("at", 0) <= max_age
+        ):
+            live.append(report["stats"])
+        else:
+            stale.append(field)
+    return live, stale
+
+
+def top_campaigns(
+    stats: Dict[int, list], n: int = 10, sort: str = "mean"
+) -> List[Dict[str, Any]]:
+    """
+    Most expensive campaigns first.
+
+    Args:
+        stats: Per-campaign stats, from `RuleProfiler.stats` or `merge_stats`
+        n: Number of campaigns to return
+        sort: One of PROFILE_SORT_KEYS
+
+    Returns:
+        Report rows with sample count, timings in milliseconds, errors and match rate
+    """
+    if sort not in PROFILE_SORT_KEYS:
+        raise ValueError(f"Unsupported sort key: {sort}")
+    rows = []
+    for campaign_id, entry in stats.items():
+        samples = entry[SAMPLES]
+        if not samples:
+            continue
+        rows.append({
+            "campaign_id": campaign_id,
+            "samples": samples,
+            "mean": entry[SECONDS] / samples * 1000,
+            "total": entry[SECONDS] * 1000,
+            "max": entry[MAX_SECONDS] * 1000,
+            "errors": entry[ERRORS],
+            "match_rate": entry[MATCHES] / samples,
+        })
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows[:n]
@@ -0,0 +1,82 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from common.logger import get_logger
+from common.metrics import (
+    startup_phase_seconds,
+    startup_ready,
+    time_to_first_event_seconds,
+)
+
+logger = get_logger(__name__)
+
+# Module import time approximates process start for the startup timings
+_PROCESS_START = time.monotonic()
+
+
+class StartupTracker:
+    """
+    Timings of a service's startup phases and its readiness.
+
+    Each `phase` is timed and exported as `startup_phase_seconds`; the service
+    reports ready (API `/ready`, worker ready file) only after `mark_ready`,
+    once connections are open and campaigns are compiled. `/health` stays a
+    pure liveness check.
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.phases: Dict[str, float] = {}
+        self.ready = False
+        self.ready_after: Optional[float] = None
+        self.first_event_after: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self.phases[name] = elapsed
+            startup_phase_seconds.labels(service=self.service, phase=name).set(elapsed)
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.ready_after = time.monotonic() - _PROCESS_START
+        startup_phase_seconds.labels(service=self.service, phase="total").set(
+            self.ready_after
+        )
+        startup_ready.labels(service=self.service).set(1)
+        logger.info(
+            "%s ready after %.3fs (%s)",
+            self.service,
+            self.ready_after,
+            ", ".join(f"{name} {secs:.3f}s" for name, secs in self.phases.items()),
+        )
+
+    def mark_not_ready(self) -> None:
+        self.ready = False
+        startup_ready.labels(service=self.service).set(0)
+
+    def event_processed(self) -> None:
+        """Record time-to-first-event; later calls are a cheap no-op."""
+        if self.first_event_after is None:
+            self.first_event_after = time.monotonic() - _PROCESS_START
+            time_to_first_event_seconds.labels(service=self.service).set(
+                self.first_event_after
+            )
+            logger.info(
+                "%s processed its first event %.3fs after start",
+                self.service,
+                self.first_event_after,
+            )
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "ready_after": self.ready_after,
+            "first_event_after": self.first_event_after,
+            "phases": self.phases,
+        }
@@ -1,4 +1,5 @@
 import asyncio
+import random
 from typing import Any, Dict, Callable
 
 def json_dumps(obj: Any) -> str:
@@ -6,9 +7,14 @@ def json_dumps(obj: Any) -> str:
     # Implementation would use json.dumps, but keeping minimal
     return str(obj)
 
-def calculate_backoff_delay(attempt: int, base_delay: float = 1.0) -> float:
-    """Calculate exponential backoff delay in seconds."""
-    return base_delay * (2 ** attempt)
+def calculate_backoff_delay(
+    attempt: int, base_delay: float = 1.0, jitter: bool = False
+) -> float:
+    """Calculate exponential backoff delay in seconds (full jitter if requested)."""
+    delay = base_delay * (2 ** attempt)
+    if jitter:
+        return random.uniform(0, delay)
+    return delay
 
 async def retry_with_backoff(
     func: Callable,
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional, Tuple
+
+from common.constants import WINDOW_AGGREGATES
+
+
+class WindowSpec:
+    """
+    Parsed definition of a `window` rule node.
+
+    A window aggregates events sharing the same value of `key` (e.g. `user_id`)
+    over the last `seconds` seconds. Only events matching the optional `where`
+    sub-rule contribute. `aggregate` is `count` or `sum` (of `field`).
+    """
+
+    __slots__ = ("id", "aggregate", "key", "field", "seconds", "where")
+
+    def __init__(self, definition: Dict[str, Any]):
+        aggregate = definition.get("aggregate", "count")
+        if aggregate not in WINDOW_AGGREGATES:
+            raise ValueError(f"Unsupported window aggregate: {aggregate}")
+        if not definition.get("key"):
+            raise ValueError("Window requires a 'key' field")
+        if aggregate == "sum" and not definition.get("field"):
+            raise ValueError("Window 'sum' aggregate requires a 'field'")
+        seconds = definition.get("seconds")
+        if not isinstance(seconds, (int, float)) or seconds <= 0:
+            raise ValueError("Window 'seconds' must be a positive number")
+
+        self.aggregate = aggregate
+        self.key = definition["key"]
+        self.field = definition.get("field")
+        self.seconds = float(seconds)
+        self.where = definition.get("where")
+        self.id = window_id(definition)
+
+
+def window_id(definition: Dict[str, Any]) -> str:
+    """
+    Stable identifier of a window definition.
+
+    Campaigns declaring the same window (ignoring the comparison applied to it)
+    share one piece of state.
+    """
+    identity = {k: definition.get(k) for k in ("key", "field", "seconds", "where")}
+    identity["aggregate"] = definition.get("aggregate", "count")
+    encoded = json.dumps(identity, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+class _Ring:
+    """Time-bucketed counts and sums for one (window, key) pair."""
+
+    __slots__ = ("seconds", "width", "buckets")
+
+    def __init__(self, seconds: float, width: float, buckets=None):
+        self.seconds = seconds
+        self.width = width
+        # Each bucket is [bucket_start, count, sum], oldest first
+        self.buckets: deque = deque(buckets or ())
+
+    def expire(self, now: float) -> None:
+        horizon = now - self.seconds
+        while self.buckets and self.buckets[0][0] + self.width <= horizon:
+            self.buckets.popleft()
+
+    def add(self, now: float, amount: float) -> None:
+        start = now - (now % self.width)
+        if self.buckets and self.buckets[-1][0] == start:
+            bucket = self.buckets[-1]
+            bucket[1] += 1
+            bucket[2] += amount
+        else:
+            self.buckets.append([start, 1, amount])
+
+    def total(self, aggregate: str) -> float:
+        index = 1 if aggregate == "count" else 2
+        return sum(bucket[index] for bucket in self.buckets)
+
+    def last_update(self) -> float:
+        return self.buckets[-1][0] + self.width if self.buckets else float("-inf")
+
+
+class SlidingWindowStore:
+    """
+    In-worker state for windowed rule operators.
+
+    Each (window, key) pair holds a ring of at most `buckets_per_window` time
+    buckets, so a window is accurate to `seconds / buckets_per_window`. Memory
+    is bounded by `max_keys` (least recently updated pairs are evicted first)
+    and pairs with no events inside their window are dropped by
+    `evict_expired`. Pairs changed since the last `drain_changes` call are
+    tracked so they can be checkpointed incrementally.
+    """
+
+    def __init__(self, max_keys: int = 100000, buckets_per_window: int = 60):
+        self.max_keys = max_keys
+        self.buckets_per_window = buckets_per_window
+        self._rings: "OrderedDict[str, _Ring]" = OrderedDict()
+        self._dirty: set = set()
+        self._removed: set = set()
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    @staticmethod
+    def _state_key(spec: WindowSpec, key_value: Any) -> str:
+        return f"{spec.id}:{key_value}"
+
+    def add(
+        self,
+        spec: WindowSpec,
+        key_value: Any,
+        amount: float = 1,
+        now: Optional[float] = None,
+    ) -> float:
+        """Record an event for `key_value` and return the updated aggregate."""
+        now = time.time() if now is None else now
+        state_key = self._state_key(spec, key_value)
+        ring = self._rings.get(state_key)
+        if ring is None:
+            ring = _Ring(spec.seconds, spec.seconds / self.buckets_per_window)
+            self._rings[state_key] = ring
+            self._evict_overflow()
+        else:
+            self._rings.move_to_end(state_key)
+
+        ring.expire(now)
+        ring.add(now, amount)
+        self._dirty.add(state_key)
+        self._removed.discard(state_key)
+        return ring.total(spec.aggregate)
+
+    def current(
+        self, spec: WindowSpec, key_value: Any, now: Optional[float] = None
+    ) -> float:
+        """Return the aggregate for `key_value` without recording an event."""
+        ring = self._rings.get(self._state_key(spec, key_value))
+        if ring is None:
+            return 0
+        ring.expire(time.time() if now is None else now)
+        return ring.total(spec.aggregate)
+
+    def _evict_overflow(self) -> None:
+        while len(self._rings) > self.max_keys:
+            state_key, _ = self._rings.popitem(last=False)
+            self._forget(state_key)
+
+    def _forget(self, state_key: str) -> None:
+        self._dirty.discard(state_key)
+        self._removed.add(state_key)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Drop pairs whose newest bucket has left the window. Returns the count."""
+        now = time.time() if now is None else now
+        expired = [
+            state_key
+            for state_key, ring in self._rings.items()
+            if ring.last_update() <= now - ring.seconds
+        ]
+        for state_key in expired:
+            del self._rings[state_key]
+            self._forget(state_key)
+        return len(expired)
+
+    def drain_changes(self) -> Tuple[Dict[str, str], list[str]]:
+        """
+        Return state changed since the previous call.
+
+        Returns:
+            Tuple of (serialized rings by state key, state keys to delete)
+        """
+        updated = {
+            state_key: json.dumps(
+                {
+                    "s": self._rings[state_key].seconds,
+                    "w": self._rings[state_key].width,
+                    "b": list(self._rings[state_key].buckets),
+                }
+            )
+            for state_key in self._dirty
+        }
+        removed = list(self._removed)
+        self._dirty.clear()
+        self._removed.clear()
+        return updated, removed
+
+    def load(self, entries: Dict[Any, Any]) -> None:
+        """Restore rings previously produced by `drain_changes`."""
+        for state_key, raw in entries.items():
+            if isinstance(state_key, bytes):
+                state_key = state_key.decode("utf-8")
+            data = json.loads(raw)
+            self._rings[state_key] = _Ring(data["s"], data["w"], data["b"])
+        self._evict_overflow()
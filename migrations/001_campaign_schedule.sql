@@ -0,0 +1,7 @@
+-- Campaign activation windows and global trigger caps.
+-- Existing campaigns keep NULLs: live immediately, forever, uncapped.
+ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS starts_at TIMESTAMPTZ;
+ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS ends_at TIMESTAMPTZ;
+ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS max_triggers INTEGER;
+
+CREATE INDEX IF NOT EXISTS ix_campaigns_ends_at ON campaigns (ends_at);
@@ -0,0 +1,6 @@
+-- Stored user attributes, read by the worker for `user.*` rule fields.
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id VARCHAR PRIMARY KEY,
+    attributes JSON NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
@@ -0,0 +1,48 @@
+-- Leaner events layout: JSONB payload, event_type/user_id as indexed columns,
+-- campaign_triggers as an indexed integer array.
+-- Rewrites the events table; run during a quiet period on large tables.
+--
+-- Deploy order: stop the workers, run this migration, then deploy the new API
+-- and worker. Workers from before this change fail against the new layout and
+-- new ones against the old layout, so either would move every event it reads
+-- to the dead-letter stream. Events published meanwhile wait in Redis.
+-- Safe to re-run.
+BEGIN;
+
+-- Set before the type change so the rewrite already stores lz4: payloads past
+-- the TOAST threshold (~2 kB) are compressed, and lz4 is faster than pglz
+ALTER TABLE events ALTER COLUMN payload SET COMPRESSION lz4;
+ALTER TABLE events ALTER COLUMN payload TYPE JSONB USING payload::jsonb;
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS event_type VARCHAR;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS user_id VARCHAR;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'events' AND column_name = 'campaign_triggers' AND data_type = 'json'
+    ) THEN
+        ALTER TABLE events RENAME COLUMN campaign_triggers TO campaign_triggers_json;
+        ALTER TABLE events ADD COLUMN campaign_triggers INTEGER[];
+
+        UPDATE events SET
+            event_type = payload->>'event_type',
+            user_id = payload->>'user_id',
+            campaign_triggers = CASE
+                WHEN json_typeof(campaign_triggers_json) = 'array'
+                THEN ARRAY(SELECT json_array_elements_text(campaign_triggers_json)::int)
+            END;
+
+        ALTER TABLE events DROP COLUMN campaign_triggers_json;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_events_event_type ON events (event_type);
+CREATE INDEX IF NOT EXISTS ix_events_user_id ON events (user_id);
+CREATE INDEX IF NOT EXISTS ix_events_campaign_triggers ON events USING GIN (campaign_triggers);
+
+COMMIT;
+
+-- Make the space of the old row versions reusable (cannot run inside the transaction)
+VACUUM ANALYZE events;
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Memory per campaign: ORM instances vs CampaignSnapshot.
+
+Builds N campaigns whose rules are combinations of a few hundred distinct
+conditions, decoding each row's rules from JSON text as the database driver
+would, and reports the bytes retained per campaign (tracemalloc) by:
+- full `Campaign` ORM instances (what `select(Campaign)` returns), and
+- `build_snapshot` over `(id, rules)` rows (what the worker now keeps).
+
+Usage:
+    POSTGRES_PASSWORD=x python scripts/bench_campaign_snapshot.py [--campaigns 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models import Campaign  # noqa: E402
+from common.campaign_snapshot import build_snapshot  # noqa: E402
+
+
+def make_rule_texts(count: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    event_types = ["purchase", "signup", "login", "view"]
+    countries = ["US", "CA", "FR", "DE", "UK", "JP"]
+    conditions = (
+        [{"field": "event_type", "operator": "equals", "value": t} for t in event_types]
+        + [{"field": "country", "operator": "in", "value": [c]} for c in countries]
+        + [
+            {"field": "amount", "operator": "greater_than", "value": v}
+            for v in range(0, 1000, 5)
+        ]
+        + [
+            {"field": "email", "operator": "contains", "value": f"domain{i}"}
+            for i in range(50)
+        ]
+    )
+    return [json.dumps({"and": rng.sample(conditions, 3)}) for _ in range(count)]
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Campaign snapshot memory benchmark")
+    parser.add_argument("--campaigns", type=int, default=100000)
+    args = parser.parse_args()
+
+    texts = make_rule_texts(args.campaigns)
+    now = datetime.now(timezone.utc)
+
+    orm_bytes = measure(lambda: [
+        Campaign(id=i, name=f"Campaign {i}", rules=json.loads(text), created_at=now)
+        for i, text in enumerate(texts)
+    ])
+    snapshot_bytes = measure(
+        lambda: build_snapshot((i, json.loads(text)) for i, text in enumerate(texts))
+    )
+
+    n = args.campaigns
+    print(f"campaigns:          {n}")
+    results = (("ORM instances", orm_bytes), ("CampaignSnapshot", snapshot_bytes))
+    for label, size in results:
+        per_campaign = f"{size / n:8.0f} bytes/campaign"
+        print(f"{label + ':':<20}{per_campaign}  ({size / 2**20:.1f} MiB)")
+    print(f"reduction:          {orm_bytes / max(snapshot_bytes, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Events table: size and insert throughput of the old and new layouts.
+
+Against a running Postgres (e.g. `docker-compose up -d postgres`), creates two
+scratch tables shaped like `events` before and after
+migrations/003_events_storage.sql:
+- old: JSON payload, JSON campaign_triggers;
+- new: JSONB payload (lz4 TOAST), event_type/user_id columns, INTEGER[]
+  campaign_triggers, with the same indexes as the model.
+
+Inserts the same generated events into each with batched INSERTs and reports
+rows/s and total size (table + TOAST + indexes) per million events. The
+scratch tables are dropped afterwards. Payloads are padded to --payload-bytes
+(default 1000, a typical event); --large-payloads pads to 4000 so they cross
+the ~2 kB TOAST threshold and the lz4 compression is exercised.
+
+Usage: POSTGRES_PASSWORD=x python scripts/bench_events_storage.py [--events 200000]
+           [--payload-bytes 1000] [--large-payloads]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncpg  # noqa: E402
+
+from common.config import config  # noqa: E402
+
+LAYOUTS = {
+    "old": {
+        "ddl": """
+            CREATE TABLE bench_events_old (
+                id SERIAL PRIMARY KEY,
+                event_id VARCHAR UNIQUE NOT NULL,
+                payload JSON NOT NULL,
+                campaign_triggers JSON,
+                processed_at TIMESTAMPTZ
+            )
+        """,
+        "insert": """
+            INSERT INTO bench_events_old
+                (event_id, payload, campaign_triggers, processed_at)
+            VALUES ($1, $2::json, $3::json, now())
+        """,
+    },
+    "new": {
+        "ddl": """
+            CREATE TABLE bench_events_new (
+                id SERIAL PRIMARY KEY,
+                event_id VARCHAR UNIQUE NOT NULL,
+                event_type VARCHAR,
+                user_id VARCHAR,
+                payload JSONB COMPRESSION lz4 NOT NULL,
+                campaign_triggers INTEGER[],
+                processed_at TIMESTAMPTZ
+            );
+            CREATE INDEX ON bench_events_new (event_type);
+            CREATE INDEX ON bench_events_new (user_id);
+            CREATE INDEX ON bench_events_new USING GIN (campaign_triggers);
+        """,
+        "insert": """
+            INSERT INTO bench_events_new
+                (event_id, event_type, user_id, payload,
+                 campaign_triggers, processed_at)
+            VALUES ($1, $2, $3, $4::jsonb, $5, now())
+        """,
+    },
+}
+
+
+def make_events(
+    count: int, payload_bytes: int, seed: int = 42
+) -> list[tuple[str, dict, list[int]]]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        payload = {
+            "event_type": rng.choice(["purchase", "signup", "login", "view"]),
+            "user_id": f"user-{rng.randrange(100000)}",
+            "amount": round(rng.uniform(1, 500), 2),
+            "country": rng.choice(["US", "CA", "FR", "DE", "UK", "JP"]),
+        }
+        if payload_bytes > 0:
+            padding = (rng.choice("abcdefgh ") for _ in range(payload_bytes))
+            payload["metadata"] = "".join(padding)
+        triggers = rng.sample(range(1, 200), rng.choice([0, 0, 0, 1, 1, 2]))
+        events.append((f"bench-{i}", payload, triggers))
+    return events
+
+
+def rows_for(layout: str, events) -> list[tuple]:
+    if layout == "old":
+        return [
+            (event_id, json.dumps(payload), json.dumps(triggers))
+            for event_id, payload, triggers in events
+        ]
+    return [
+        (
+            event_id,
+            payload["event_type"],
+            payload["user_id"],
+            json.dumps(payload),
+            triggers,
+        )
+        for event_id, payload, triggers in events
+    ]
+
+
+async def run_layout(conn, layout: str, events, batch: int) -> tuple[float, int]:
+    table = f"bench_events_{layout}"
+    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+    await conn.execute(LAYOUTS[layout]["ddl"])
+    rows = rows_for(layout, events)
+
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch):
+        await conn.executemany(LAYOUTS[layout]["insert"], rows[i:i + batch])
+    elapsed = time.perf_counter() - start
+
+    await conn.execute(f"VACUUM ANALYZE {table}")
+    size = await conn.fetchval("SELECT pg_total_relation_size($1::regclass)", table)
+    await conn.execute(f"DROP TABLE {table}")
+    return len(rows) / elapsed, size
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Events storage layout benchmark")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument(
+        "--payload-bytes", type=int, default=1000, help="padding added to each payload"
+    )
+    parser.add_argument(
+        "--large-payloads",
+        action="store_true",
+        help="pad to 4000 bytes, past the TOAST threshold",
+    )
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    if args.large_payloads:
+        args.payload_bytes = 4000
+
+    events = make_events(args.events, args.payload_bytes)
+    dsn = config.database_url.replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn)
+    try:
+        print(f"{args.events} events, ~{args.payload_bytes} bytes of padding each")
+        print(f"{'layout':<8}{'rows/s':>12}{'MB per 1M events':>20}")
+        for layout in LAYOUTS:
+            rate, size = await run_layout(conn, layout, events, args.batch)
+            print(f"{layout:<8}{rate:>12.0f}{size / args.events * 1e6 / 2**20:>20.1f}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
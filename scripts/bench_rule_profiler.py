@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Matching overhead of sampled rule profiling.
+
+Compiles N campaigns and matches the same generated events without a
+profiler and with RuleProfiler at several sample rates. Reports the time per
+event (best of --runs) and the overhead relative to no profiler.
+
+Usage: python scripts/bench_rule_profiler.py [--campaigns 1000] [--events 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.campaign_snapshot import CampaignSnapshot  # noqa: E402
+from common.rule_compiler import CompiledRuleSet  # noqa: E402
+from common.rule_profiler import RuleProfiler  # noqa: E402
+
+EVENT_TYPES = ["purchase", "signup", "login", "view"]
+COUNTRIES = ["US", "CA", "FR", "DE", "UK", "JP"]
+
+
+def make_campaigns(count: int, rng: random.Random) -> list[CampaignSnapshot]:
+    conditions = (
+        [{"field": "event_type", "operator": "equals", "value": t} for t in EVENT_TYPES]
+        + [{"field": "country", "operator": "in", "value": [c]} for c in COUNTRIES]
+        + [
+            {"field": "amount", "operator": "greater_than", "value": v}
+            for v in range(0, 1000, 5)
+        ]
+        + [
+            {"field": "title", "operator": "contains", "value": f"word{i}"}
+            for i in range(50)
+        ]
+    )
+    return [
+        CampaignSnapshot(i, {"and": rng.sample(conditions, 3)}) for i in range(count)
+    ]
+
+
+def make_events(count: int, rng: random.Random) -> list[dict]:
+    return [
+        {
+            "event_type": rng.choice(EVENT_TYPES),
+            "country": rng.choice(COUNTRIES),
+            "amount": rng.uniform(0, 1000),
+            "title": f"word{rng.randrange(100)} sale",
+        }
+        for _ in range(count)
+    ]
+
+
+def seconds_per_event(ruleset, events, profiler, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        for event in events:
+            ruleset.match(event, profiler=profiler)
+        best = min(best, time.perf_counter() - start)
+    return best / len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule profiler overhead benchmark")
+    parser.add_argument("--campaigns", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    ruleset = CompiledRuleSet(make_campaigns(args.campaigns, rng))
+    events = make_events(args.events, rng)
+
+    baseline = seconds_per_event(ruleset, events, None, args.runs)
+    print(f"{args.campaigns} campaigns, {args.events} events")
+    print(f"{'profiler':<14}{'us/event':>10}{'overhead':>10}")
+    print(f"{'off':<14}{baseline * 1e6:>10.1f}{'':>10}")
+    for rate in (0.0, 0.01, 0.1, 1.0):
+        per_event = seconds_per_event(ruleset, events, RuleProfiler(rate), args.runs)
+        overhead = per_event / baseline - 1
+        print(f"{f'rate {rate:g}':<14}{per_event * 1e6:>10.1f}{overhead:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Cold-start cost of the API and worker.
+
+1. Import time of each role's entry module, in fresh interpreters (median of
+   --runs). Needs no services.
+2. With --live, against a running Redis and Postgres (e.g. `docker-compose up
+   -d redispubsub postgres`): starts a worker process, waits for its ready
+   file, publishes one event and waits until it has been consumed. Reports
+   time-to-ready and time-to-first-event from process spawn, plus the worker's
+   own phase timings from its log.
+
+Usage: python scripts/bench_startup.py [--runs 5] [--live]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def import_seconds(module: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def wait_for(predicate, timeout: float, interval: float = 0.01) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def live_worker(timeout: float) -> dict:
+    import redis
+
+    from common.config import config
+    from common.partitions import partition_for, stream_key
+
+    ready_file = f"/tmp/bench-worker-ready-{os.getpid()}"
+    env = {**os.environ, "WORKER_READY_FILE": ready_file, "PYTHONPATH": ROOT}
+    client = redis.Redis.from_url(config.REDIS_URL)
+    user_id = f"bench-{uuid.uuid4()}"
+    stream = stream_key(partition_for(user_id, config.EVENT_PARTITIONS))
+
+    spawned = time.monotonic()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "worker.main"], cwd=ROOT, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        if not wait_for(lambda: os.path.exists(ready_file), timeout):
+            raise SystemExit("worker did not become ready (is docker-compose up?)")
+        ready = time.monotonic() - spawned
+
+        event = {
+            "event_id": f"bench-{uuid.uuid4()}",
+            "payload": {"event_type": "bench", "user_id": user_id},
+        }
+        entry_id = client.xadd(stream, {"data": json.dumps(event)})
+        consumed = wait_for(
+            lambda: not client.xrange(stream, entry_id, entry_id), timeout
+        )
+        first_event = time.monotonic() - spawned if consumed else None
+    finally:
+        worker.terminate()
+        output, _ = worker.communicate(timeout=10)
+        if os.path.exists(ready_file):
+            os.remove(ready_file)
+
+    phases = [
+        line
+        for line in output.splitlines()
+        if "ready after" in line or "first event" in line
+    ]
+    return {"ready": ready, "first_event": first_event, "log": phases}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--live", action="store_true", help="start a real worker against Redis/Postgres"
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    for module in ("api.main", "worker.consumer"):
+        milliseconds = import_seconds(module, args.runs) * 1000
+        print(f"import {module:<16} {milliseconds:8.1f} ms (median of {args.runs})")
+
+    if args.live:
+        result = live_worker(args.timeout)
+        print(f"worker time-to-ready        {result['ready'] * 1000:8.1f} ms")
+        if result["first_event"] is None:
+            print("worker time-to-first-event  (event not consumed before timeout)")
+        else:
+            print(f"worker time-to-first-event  {result['first_event'] * 1000:8.1f} ms")
+        for line in result["log"]:
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
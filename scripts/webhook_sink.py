@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Local stand-in for a campaign trigger webhook.
+
+Accepts the batched POSTs sent by the worker's trigger dispatcher and prints a
+one-line summary per request. Point the worker at it with
+TRIGGER_WEBHOOK_URL=http://localhost:9000/hook.
+
+Usage: python scripts/webhook_sink.py [--port 9000] [--fail-rate 0.0]
+"""
+import argparse
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(fail_rate: float):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        received = 0
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            triggers = json.loads(body).get("triggers", [])
+            count = sum(len(group["events"]) for group in triggers)
+            WebhookHandler.received += count
+            print(
+                f"batch: {count} triggers across {len(triggers)} campaigns "
+                f"(total {WebhookHandler.received})",
+                flush=True,
+            )
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--fail-rate",
+        type=float,
+        default=0.0,
+        help="fraction of requests answered with 503",
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(args.fail_rate))
+    print(f"Webhook sink listening on :{args.port}", flush=True)
+    server.serve_forever()
@@ -7,7 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.db import get_session
 from api.models import Campaign, Event
-from common.constants import EVENTS_QUEUE
+from common.config import config
+from common.partitions import stream_key
 import redis
 
 
@@ -89,7 +90,7 @@ async def test_full_campaign_event_flow():
     # Test 7: Verify Redis queue is empty (event consumed)
     try:
         redis_conn = redis.Redis(host="localhost", port=6379, decode_responses=True)
-        queue_length = redis_conn.llen(EVENTS_QUEUE)
+        queue_length = sum(redis_conn.xlen(stream_key(p)) for p in range(config.EVENT_PARTITIONS))
         assert queue_length == 0  # Event should be consumed
     except Exception as e:
         pytest.skip(f"Redis not available for queue check: {e}")
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from common.active_set import ActiveSet
+from common.campaign_snapshot import CampaignSnapshot, build_snapshot
+from common.rule_compiler import CompiledRuleSet
+from worker.utils.campaign_cache import CampaignCache
+
+RULE = {"event_type": "purchase"}
+
+def test_snapshot_converts_schedule_to_epoch():
+    starts = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    snapshot = build_snapshot([(1, RULE, starts, None, 10)])
+    assert snapshot[0] == CampaignSnapshot(1, RULE, starts.timestamp(), None, 10)
+
+def test_campaigns_switch_at_boundaries():
+    campaigns = [
+        CampaignSnapshot(1, RULE),
+        CampaignSnapshot(2, RULE, starts_at=100),
+        CampaignSnapshot(3, RULE, ends_at=150),
+        CampaignSnapshot(4, RULE, ends_at=10),
+    ]
+    active = ActiveSet(campaigns, now=50)
+    assert active.active == {1, 3}
+    assert active.next_boundary() == 100
+
+    assert not active.advance(99)
+    assert active.advance(100)
+    assert active.active == {1, 2, 3}
+    assert active.advance(150)
+    assert active.active == {1, 2}
+
+def test_exhausted_campaign_does_not_start():
+    active = ActiveSet([CampaignSnapshot(1, RULE, starts_at=100)], now=0)
+    assert not active.exhaust(1)
+    active.advance(100)
+    assert 1 not in active
+
+def test_ruleset_matches_only_active():
+    ruleset = CompiledRuleSet([CampaignSnapshot(1, RULE), CampaignSnapshot(2, RULE)])
+    ruleset.set_active({2})
+    assert ruleset.match({"event_type": "purchase"}) == [2]
+
+@pytest.mark.asyncio
+async def test_caps_reject_over_limit_and_exhaust():
+    cache = CampaignCache(ttl=60)
+    campaigns = [CampaignSnapshot(1, RULE, max_triggers=3), CampaignSnapshot(2, RULE)]
+    cache.ruleset = CompiledRuleSet(campaigns)
+    cache.active = ActiveSet(campaigns, now=0)
+    cache.caps = {1: 3}
+
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[3])
+    cache.redis = MagicMock()
+    cache.redis.pipeline.return_value = pipe
+
+    assert await cache.apply_caps([1, 2]) == [1, 2]
+    pipe.incr.assert_called_once_with("campaign_trigger_count:1")
+    assert cache.ruleset.match({"event_type": "purchase"}) == [2]
+
+    pipe.execute = AsyncMock(return_value=[4])
+    assert await cache.apply_caps([1, 2]) == [2]
+
+@pytest.mark.asyncio
+async def test_release_caps_undoes_counting_for_unstored_triggers():
+    cache = CampaignCache(ttl=60)
+    cache.caps = {1: 3}
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[2])
+    cache.redis = MagicMock()
+    cache.redis.pipeline.return_value = pipe
+
+    await cache.release_caps([1, 2])
+    pipe.decr.assert_called_once_with("campaign_trigger_count:1")
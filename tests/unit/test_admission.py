@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from api.utils.admission import AdmissionController
+
+def make_client(length, pending):
+    client = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[length, pending])
+    client.pipeline.return_value = pipe
+    return client, pipe
+
+def make_controller(client, probe_interval=60.0):
+    return AdmissionController(
+        client,
+        high_watermark=100,
+        priority_high_watermark=500,
+        priority_event_types=["purchase"],
+        probe_interval=probe_interval,
+    )
+
+@pytest.mark.asyncio
+async def test_admit_below_watermark():
+    client, _ = make_client(10, {"pending": 3})
+    controller = make_controller(client)
+
+    assert await controller.admit("page_view") is True
+    assert controller.lag == 10
+    assert controller.pending == 3
+
+@pytest.mark.asyncio
+async def test_priority_lane_keeps_flowing():
+    client, _ = make_client(200, {"pending": 0})
+    controller = make_controller(client)
+
+    assert await controller.admit("page_view") is False
+    assert await controller.admit("purchase") is True
+
+    controller.lag = 500
+    assert await controller.admit("purchase") is False
+
+@pytest.mark.asyncio
+async def test_probe_is_cached():
+    client, pipe = make_client(10, {"pending": 0})
+    controller = make_controller(client)
+
+    for _ in range(5):
+        await controller.admit("signup")
+    assert pipe.execute.await_count == 1
+
+@pytest.mark.asyncio
+async def test_missing_stream_or_group_counts_as_empty():
+    client, _ = make_client(0, Exception("NOGROUP No such key"))
+    controller = make_controller(client, probe_interval=0)
+
+    assert await controller.admit("signup") is True
+    assert controller.pending == 0
+
+@pytest.mark.asyncio
+async def test_probe_failure_fails_open():
+    client, pipe = make_client(0, {"pending": 0})
+    pipe.execute.side_effect = ConnectionError("redis down")
+    controller = make_controller(client, probe_interval=0)
+
+    assert await controller.admit("signup") is True
@@ -0,0 +1,53 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api.utils.campaign_bulk import BulkValidationError, copy_campaigns, parse_bulk_body, validate_campaigns
+
+CAMPAIGN = {"name": "Big spenders", "rules": {"field": "amount", "operator": "greater_than", "value": 100}}
+
+def test_parse_json_array_and_ndjson():
+    items = [CAMPAIGN, {**CAMPAIGN, "name": "Other"}]
+    assert parse_bulk_body(json.dumps(items).encode(), "application/json") == items
+    ndjson = "\n".join(json.dumps(item) for item in items) + "\n\n"
+    assert parse_bulk_body(ndjson.encode(), "application/x-ndjson") == items
+    with pytest.raises(ValueError):
+        parse_bulk_body(b'{"name": "x"}', "application/json")
+
+def test_one_invalid_campaign_rejects_the_batch():
+    items = [
+        CAMPAIGN,
+        {"name": "Bad operator", "rules": {"field": "amount", "operator": "approx", "value": 1}},
+        {"rules": {"event_type": "signup"}},
+    ]
+    with pytest.raises(BulkValidationError) as excinfo:
+        validate_campaigns(items)
+    assert excinfo.value.total == 2
+    assert [error["index"] for error in excinfo.value.errors] == [1, 2]
+
+@pytest.mark.asyncio
+async def test_copy_reserves_ids_and_copies_in_order():
+    driver = MagicMock()
+    driver.fetch = AsyncMock(return_value=[(11,), (12,)])
+    driver.copy_records_to_table = AsyncMock()
+    raw = MagicMock(driver_connection=driver)
+    conn = MagicMock(get_raw_connection=AsyncMock(return_value=raw))
+    session = MagicMock(connection=AsyncMock(return_value=conn))
+
+    campaigns = validate_campaigns([CAMPAIGN, {**CAMPAIGN, "name": "Second", "max_triggers": 5}])
+    assert await copy_campaigns(session, campaigns) == [11, 12]
+
+    records = driver.copy_records_to_table.await_args.kwargs["records"]
+    assert [(r[0], r[1], r[5]) for r in records] == [(11, "Big spenders", None), (12, "Second", 5)]
+    assert json.loads(records[0][2])["operator"] == "greater_than"
+
+def test_naive_and_aware_schedule_times_compare_as_utc():
+    campaigns = validate_campaigns([
+        {**CAMPAIGN, "starts_at": "2026-01-01T10:00:00", "ends_at": "2026-01-01T13:00:00+02:00"},
+    ])
+    assert campaigns[0][0].starts_at.tzinfo is not None
+
+    with pytest.raises(BulkValidationError) as excinfo:
+        validate_campaigns([{**CAMPAIGN, "starts_at": "2026-01-01T10:00:00", "ends_at": "2026-01-01T11:00:00+02:00"}])
+    assert excinfo.value.errors[0]["index"] == 0
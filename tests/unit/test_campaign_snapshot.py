@@ -0,0 +1,20 @@
+from common.campaign_snapshot import CampaignSnapshot, build_snapshot
+from common.rule_compiler import CompiledRuleSet
+
+def test_identical_rules_are_shared():
+    purchase = {"field": "event_type", "operator": "equals", "value": "purchase"}
+    rows = [
+        (1, {"and": [dict(purchase), {"field": "amount", "operator": "greater_than", "value": 5}]}),
+        (2, {"and": [dict(purchase), {"field": "amount", "operator": "greater_than", "value": 5}]}),
+        (3, {"or": [dict(purchase)]}),
+    ]
+    snapshot = build_snapshot(rows)
+
+    assert snapshot[0] == CampaignSnapshot(1, rows[0][1])
+    assert snapshot[0].rules is snapshot[1].rules
+    assert snapshot[0].rules["and"][0] is snapshot[2].rules["or"][0]
+    assert not hasattr(snapshot[0], "__dict__")
+
+def test_snapshot_compiles():
+    snapshot = build_snapshot([(1, {"event_type": "purchase"}), (2, {"event_type": "purchase"})])
+    assert CompiledRuleSet(snapshot).match({"event_type": "purchase"}) == [1, 2]
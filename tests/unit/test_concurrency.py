@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from common.concurrency import AIMDLimiter
+from worker.utils.concurrency import OrderedLanes
+
+def _limiter(**kwargs):
+    defaults = dict(initial=4, min_limit=1, max_limit=8, target_latency=0.05, window=10)
+    defaults.update(kwargs)
+    return AIMDLimiter(**defaults)
+
+def test_backs_off_when_p99_over_target():
+    limiter = _limiter()
+    for _ in range(9):
+        limiter.observe(0.01)
+    assert limiter.limit == 4
+    limiter.observe(0.5)
+    assert limiter.limit == 3
+
+def test_backs_off_on_errors_and_respects_minimum():
+    limiter = _limiter(initial=1)
+    for _ in range(10):
+        limiter.observe(0.01, error=True)
+    assert limiter.limit == 1
+
+def test_grows_only_when_saturated():
+    limiter = _limiter()
+    for _ in range(10):
+        limiter.observe(0.01)
+    assert limiter.limit == 4  # never reached the limit
+
+    limiter._saturated = True
+    for _ in range(10):
+        limiter.observe(0.01)
+    assert limiter.limit == 5
+
+@pytest.mark.asyncio
+async def test_in_flight_never_exceeds_limit():
+    limiter = _limiter(initial=2)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(work() for _ in range(10)))
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_lanes_overlap_across_keys_but_keep_order_within_a_key():
+    lanes = OrderedLanes()
+    log = []
+    running = 0
+    peak = 0
+
+    async def job(key, n):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        log.append((key, n))
+        running -= 1
+
+    for n in range(3):
+        for key in ("a", "b", "c"):
+            lanes.submit(key, job, key, n)
+    await asyncio.wait(set(lanes.tasks))
+
+    assert peak == 3
+    for key in ("a", "b", "c"):
+        assert [n for k, n in log if k == key] == [0, 1, 2]
+    assert len(lanes) == 0
+
+@pytest.mark.asyncio
+async def test_lanes_drain_drops_jobs_not_started():
+    lanes = OrderedLanes()
+    started = []
+    release = asyncio.Event()
+
+    async def job(n):
+        started.append(n)
+        await release.wait()
+
+    for n in range(3):
+        lanes.submit("user-1", job, n)
+    await asyncio.sleep(0)
+    drained = asyncio.create_task(lanes.drain())
+    await asyncio.sleep(0)
+    release.set()
+    await drained
+
+    assert started == [0]
+
+@pytest.mark.asyncio
+async def test_lanes_continue_after_a_failed_job():
+    lanes = OrderedLanes()
+    done = []
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def ok():
+        done.append(True)
+
+    lanes.submit("k", fail)
+    lanes.submit("k", ok)
+    await asyncio.wait(set(lanes.tasks))
+
+    assert done == [True]
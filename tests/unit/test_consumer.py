@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.constants import DEAD_LETTER_QUEUE
+from common.windows import SlidingWindowStore, WindowSpec
+from worker.consumer import fence_partitions, handle_message, stop_partitions
+from worker.utils.window_state import window_stores
+
+@pytest.mark.asyncio
+@patch('worker.consumer.process_event', new_callable=AsyncMock)
+async def test_failed_event_is_dead_lettered_before_ack(mock_process):
+    mock_process.side_effect = RuntimeError("db down")
+    redis_conn = AsyncMock()
+    fields = {b'data': b'{"event_id": "e1", "payload": {}}'}
+
+    await handle_message(redis_conn, "events:0", b"1-0", fields, None)
+
+    args, kwargs = redis_conn.xadd.await_args
+    assert args[0] == DEAD_LETTER_QUEUE
+    assert args[1]["data"] == fields[b'data']
+    assert args[1]["error"] == "db down"
+    redis_conn.xack.assert_awaited_once()
+    redis_conn.xdel.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_event_stays_pending_when_dead_letter_fails():
+    redis_conn = AsyncMock()
+    redis_conn.xadd.side_effect = ConnectionError("redis down")
+
+    await handle_message(redis_conn, "events:0", b"1-0", {b'data': b'not json'}, None)
+
+    redis_conn.xack.assert_not_awaited()
+    redis_conn.xdel.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_consumers_are_fenced_when_their_lease_may_lapse():
+    leaser = MagicMock()
+    leaser.holds.side_effect = lambda partition: partition == 0
+    leaser.release = AsyncMock()
+    stops = {0: asyncio.Event(), 1: asyncio.Event()}
+    tasks = {p: asyncio.create_task(asyncio.sleep(3600)) for p in stops}
+    window_stores[1] = SlidingWindowStore()
+
+    await fence_partitions(leaser, tasks, stops)
+
+    assert set(tasks) == {0}
+    assert 1 not in window_stores
+    leaser.release.assert_awaited_once_with([1])
+    tasks.pop(0).cancel()
+
+@pytest.mark.asyncio
+async def test_released_partition_flushes_its_windows():
+    redis_conn = MagicMock()
+    pipe = redis_conn.pipeline.return_value
+    pipe.execute = AsyncMock()
+    leaser = MagicMock()
+    leaser.holds.return_value = True
+    leaser.release = AsyncMock()
+    store = window_stores[3] = SlidingWindowStore()
+    store.add(WindowSpec({"key": "user_id", "seconds": 60}), "u1")
+    stops = {3: asyncio.Event()}
+    tasks = {3: asyncio.create_task(stops[3].wait())}
+
+    await stop_partitions(redis_conn, leaser, tasks, stops, [3])
+
+    assert pipe.hset.call_args.args[0] == "rule_windows:3"
+    assert 3 not in window_stores
+    leaser.release.assert_awaited_once_with([3])
@@ -0,0 +1,48 @@
+import os
+import threading
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from common.debug_profiler import HeapTracker, format_collapsed, sample_stacks
+from worker.utils.debug import write_cpu_profile
+
+def _busy_wait(stop):
+    while not stop.is_set():
+        pass
+
+def test_sample_stacks_sees_other_threads():
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_wait, args=(stop,))
+    thread.start()
+    try:
+        stacks = sample_stacks(0.05, interval=0.001)
+    finally:
+        stop.set()
+        thread.join()
+    assert any("test_debug_profiler.py:_busy_wait" in stack for stack in stacks)
+    assert not any("sample_stacks" in stack for stack in stacks)
+
+def test_format_collapsed():
+    assert format_collapsed(Counter({"a;b": 1, "a;c": 3})) == "a;c 3\na;b 1\n"
+
+def test_heap_tracker_reports_growth():
+    tracker = HeapTracker(frames=1)
+    try:
+        assert tracker.snapshot()["tracing_started"]
+        retained = [bytearray(1024) for _ in range(1000)]
+        report = tracker.snapshot(top=5)
+        assert not report["tracing_started"]
+        assert report["diff"][0]["size_diff"] >= 1024 * 1000
+        assert "test_debug_profiler.py" in report["diff"][0]["location"]
+        del retained
+    finally:
+        tracker.stop()
+
+@pytest.mark.asyncio
+async def test_worker_writes_cpu_profile(tmp_path):
+    with patch("worker.utils.debug.config.DEBUG_PROFILE_DIR", str(tmp_path)):
+        path = await write_cpu_profile(0.01)
+    assert os.path.dirname(path) == str(tmp_path)
+    assert path.endswith(".collapsed")
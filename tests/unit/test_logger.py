@@ -0,0 +1,30 @@
+import logging
+
+from unittest.mock import patch
+
+from common.logger import SamplingFilter
+
+def make_record(level=logging.INFO):
+    return logging.LogRecord("worker.processor", level, __file__, 1, "Processing event %s", ("e1",), None)
+
+def test_rate_limit_caps_records_per_second():
+    sampler = SamplingFilter("worker.processor", rate_limit=5)
+    with patch("common.logger.time.monotonic", return_value=100.0):
+        sampler._updated = 100.0
+        passed = sum(sampler.filter(make_record()) for _ in range(20))
+    assert passed == 5
+
+    # Tokens refill with time
+    with patch("common.logger.time.monotonic", return_value=101.0):
+        assert sampler.filter(make_record()) is True
+
+def test_sample_rate_and_warnings_always_pass():
+    sampler = SamplingFilter("worker.processor", sample_rate=0.0)
+    assert sampler.filter(make_record(logging.INFO)) is False
+    assert sampler.filter(make_record(logging.DEBUG)) is False
+    assert sampler.filter(make_record(logging.WARNING)) is True
+    assert sampler.filter(make_record(logging.ERROR)) is True
+
+def test_unlimited_by_default():
+    sampler = SamplingFilter("worker.processor")
+    assert all(sampler.filter(make_record()) for _ in range(1000))
@@ -0,0 +1,113 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from common.partitions import assign_partitions, partition_for, stream_key
+from worker.partitions import PartitionLeaser
+
+def test_partition_is_stable_per_user():
+    assert partition_for("user-42", 8) == partition_for("user-42", 8)
+    assert {partition_for(f"user-{i}", 8) for i in range(100)} == set(range(8))
+    assert stream_key(3) == "events:3"
+
+def test_assignment_covers_every_partition_once():
+    assignment = assign_partitions(["b", "a", "c"], 8)
+    assert sorted(p for owned in assignment.values() for p in owned) == list(range(8))
+    assert assignment["a"] == {0, 3, 6}
+    assert assign_partitions([], 8) == {}
+
+class FakeRedis:
+    """Just enough of Redis for leases: SET NX, owner-checked renew/release, and a member list."""
+
+    def __init__(self):
+        self.leases = {}
+        self.members = {}
+
+    def register_script(self, script):
+        renew = "pexpire" in script
+
+        async def run(keys, args):
+            if self.leases.get(keys[0]) != args[0]:
+                return 0
+            if not renew:
+                del self.leases[keys[0]]
+            return 1
+
+        return run
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.leases:
+            return None
+        self.leases[key] = value
+        return True
+
+    def pipeline(self, transaction=True):
+        pipe = MagicMock()
+        calls = []
+        pipe.zadd.side_effect = lambda key, mapping: calls.append(mapping)
+
+        async def execute():
+            for mapping in calls:
+                self.members.update(mapping)
+            horizon = time.time() - 10
+            live = [name for name, seen in self.members.items() if seen >= horizon]
+            return [1, 0, sorted(live)]
+
+        pipe.execute = AsyncMock(side_effect=execute)
+        return pipe
+
+    async def zrem(self, key, name):
+        self.members.pop(name, None)
+
+@pytest.mark.asyncio
+async def test_partitions_move_when_a_worker_joins_and_leaves():
+    redis_conn = FakeRedis()
+    a = PartitionLeaser(redis_conn, "a", 4, lease_ttl=10)
+    b = PartitionLeaser(redis_conn, "b", 4, lease_ttl=10)
+
+    assert await a.rebalance() == ({0, 1, 2, 3}, set())
+
+    # b joins: a must hand over b's share before b can lease it
+    assert await b.rebalance() == (set(), set())
+    acquired, released = await a.rebalance()
+    assert (acquired, released) == (set(), {1, 3})
+    await a.release(released)
+    assert await b.rebalance() == ({1, 3}, set())
+    assert a.owned == {0, 2}
+
+    # a leaves: b picks up everything
+    await a.leave()
+    assert await b.rebalance() == ({0, 2}, set())
+    assert b.owned == {0, 1, 2, 3}
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reported_lost():
+    redis_conn = FakeRedis()
+    a = PartitionLeaser(redis_conn, "a", 2, lease_ttl=10)
+    await a.rebalance()
+
+    redis_conn.leases["events_lease:1"] = "someone-else"
+    acquired, released = await a.rebalance()
+    assert released == {1}
+    assert a.owned == {0}
+
+@pytest.mark.asyncio
+async def test_lease_deadline_passes_without_renewal(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("worker.partitions.time.monotonic", lambda: now[0])
+    redis_conn = FakeRedis()
+    a = PartitionLeaser(redis_conn, "a", 2, lease_ttl=9)
+    await a.rebalance()
+    assert a.holds(0) and a.holds(1)
+
+    # Renewals keep failing (e.g. Redis unreachable): stop a whole interval before expiry
+    now[0] += 5.9
+    assert a.holds(0)
+    now[0] += 0.2
+    assert not a.holds(0)
+
+    redis_conn.leases["events_lease:1"] = "someone-else"
+    await a.rebalance()
+    assert a.holds(0)
+    assert not a.holds(1)
@@ -0,0 +1,51 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.campaign_snapshot import CampaignSnapshot
+from common.rule_compiler import CompiledRuleSet
+from common.windows import SlidingWindowStore
+from worker.processor import process_event_core
+
+THIRD_PURCHASE = {
+    "window": {
+        "aggregate": "count",
+        "key": "user_id",
+        "seconds": 86400,
+        "where": {"field": "event_type", "operator": "equals", "value": "purchase"},
+        "operator": "equals",
+        "value": 3,
+    }
+}
+
+@pytest.mark.asyncio
+async def test_windowed_rule_fires_on_third_stored_purchase():
+    ruleset = CompiledRuleSet([CampaignSnapshot(1, THIRD_PURCHASE)])
+    session = MagicMock()
+    session.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def get_session():
+        yield session
+
+    cache = MagicMock()
+    cache.get = AsyncMock(return_value=ruleset)
+    cache.apply_caps = AsyncMock(side_effect=lambda ids: ids)
+    enricher = MagicMock()
+    enricher.enrich.side_effect = lambda payload: payload
+    dispatcher = MagicMock()
+    store = SlidingWindowStore()
+
+    with patch("worker.processor.get_session", get_session), \
+            patch("worker.processor.is_event_processed", AsyncMock(return_value=False)), \
+            patch("worker.processor.campaign_cache", cache), \
+            patch("worker.processor.profile_enricher", enricher), \
+            patch("worker.processor.trigger_dispatcher", dispatcher):
+        for i in range(3):
+            event = {"event_id": f"e{i}", "payload": {"event_type": "purchase", "user_id": "u1"}}
+            await process_event_core(event, store)
+
+    triggered = [call.args[2] for call in dispatcher.enqueue.call_args_list]
+    assert triggered == [[], [], [1]]
+    assert len(store) == 1
@@ -0,0 +1,92 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from common.campaign_snapshot import CampaignSnapshot
+from common.rule_compiler import CompiledRuleSet
+from common.ttl_cache import TTLCache
+from worker.utils.profiles import ProfileEnricher, profile_attributes
+
+def test_ttl_cache_evicts_lru_and_expired():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+
+    now[0] = 10
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+def test_ruleset_fields_follow_active_campaigns():
+    ruleset = CompiledRuleSet([
+        CampaignSnapshot(1, {"and": [
+            {"field": "user.age", "operator": "greater_than", "value": 30},
+            {"field": "event_type", "operator": "equals", "value": "purchase"},
+        ]}),
+        CampaignSnapshot(2, {"field": "user.tier.name", "operator": "equals", "value": "gold"}),
+    ])
+    assert profile_attributes(ruleset.fields) == {"age", "tier"}
+
+    ruleset.set_active({1})
+    assert profile_attributes(ruleset.fields) == {"age"}
+
+def _session_returning(rows):
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=rows)))
+
+    @asynccontextmanager
+    async def get_session():
+        yield session
+
+    return session, get_session
+
+@pytest.mark.asyncio
+async def test_prefetch_loads_batch_once_and_enriches():
+    enricher = ProfileEnricher(maxsize=100, ttl=60)
+    session, get_session = _session_returning([("u1", 31)])
+    fields = {"user.age", "event_type"}
+
+    with patch("worker.utils.profiles.get_session", get_session):
+        await enricher.prefetch(["u1", "u2", "u1", None], fields)
+        await enricher.prefetch(["u1", "u2"], fields)
+
+    assert session.execute.await_count == 1
+    payload = {"user_id": "u1", "event_type": "purchase"}
+    assert enricher.enrich(payload)["user"] == {"age": 31}
+    assert "user" not in payload
+    assert enricher.enrich({"user_id": "u1", "user": {"age": 40}})["user"] == {"age": 40}
+    assert "user" not in enricher.enrich({"user_id": "u2"})
+
+@pytest.mark.asyncio
+async def test_no_profile_fields_skips_database():
+    enricher = ProfileEnricher(maxsize=100, ttl=60)
+    session, get_session = _session_returning([])
+    with patch("worker.utils.profiles.get_session", get_session):
+        await enricher.prefetch(["u1"], {"event_type"})
+    session.execute.assert_not_called()
+    assert enricher.enrich({"user_id": "u1"}) == {"user_id": "u1"}
+
+@pytest.mark.asyncio
+async def test_new_rule_attributes_top_up_cached_profiles():
+    enricher = ProfileEnricher(maxsize=100, ttl=60)
+    session, get_session = _session_returning([("u1", 31)])
+    with patch("worker.utils.profiles.get_session", get_session):
+        await enricher.prefetch(["u1"], {"user.age"})
+        # Active campaigns changed before u1's queued event was matched
+        session.execute.return_value.all.return_value = [("u2", 25, "gold")]
+        await enricher.prefetch(["u2"], {"user.age", "user.tier"})
+
+        assert enricher.enrich({"user_id": "u1"})["user"] == {"age": 31}
+        assert enricher.enrich({"user_id": "u2"})["user"] == {"age": 25, "tier": "gold"}
+
+        session.execute.return_value.all.return_value = [("u1", 32, "silver")]
+        await enricher.prefetch(["u1", "u2"], {"user.age", "user.tier"})
+        await enricher.prefetch(["u1"], {"user.age"})
+
+    assert session.execute.await_count == 3
+    assert enricher.enrich({"user_id": "u1"})["user"] == {"age": 32, "tier": "silver"}
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from api.utils.publisher import EventPublisher
+
+def make_publisher(results=None, max_batch=100):
+    publisher = EventPublisher("redis://unused", max_connections=4, linger=0.005, max_batch=max_batch)
+    pipe = MagicMock()
+    pipe.sent = []
+
+    async def execute(raise_on_error=True):
+        count = pipe.xadd.call_count
+        pipe.sent.extend(call.args for call in pipe.xadd.call_args_list)
+        pipe.xadd.reset_mock()
+        if results is not None:
+            return results[:count]
+        return [f"{i}-0".encode() for i in range(count)]
+
+    pipe.execute = AsyncMock(side_effect=execute)
+    publisher.client = MagicMock()
+    publisher.client.pipeline.return_value = pipe
+    publisher.client.aclose = AsyncMock()
+    publisher.client.connection_pool.disconnect = AsyncMock()
+    return publisher, pipe
+
+@pytest.mark.asyncio
+async def test_concurrent_publishes_share_one_round_trip():
+    publisher, pipe = make_publisher()
+
+    ids = await asyncio.gather(*(publisher.publish({"event_id": str(i)}) for i in range(10)))
+
+    assert pipe.execute.await_count == 1
+    assert ids == [f"{i}-0".encode() for i in range(10)]
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting():
+    publisher, pipe = make_publisher(max_batch=3)
+    publisher.linger = 10
+
+    await asyncio.wait_for(
+        asyncio.gather(*(publisher.publish({"event_id": str(i)}) for i in range(3))),
+        timeout=1,
+    )
+    assert pipe.execute.await_count == 1
+
+    # The linger timer started by the first publish must not outlive close
+    linger_task = publisher._flush_task
+    await asyncio.wait_for(publisher.close(), timeout=1)
+    assert linger_task.cancelled()
+
+@pytest.mark.asyncio
+async def test_errors_reach_only_their_caller():
+    publisher, _ = make_publisher(results=[b"1-0", ConnectionError("OOM"), b"3-0"])
+
+    results = await asyncio.gather(
+        *(publisher.publish({"event_id": str(i)}) for i in range(3)),
+        return_exceptions=True,
+    )
+    assert results[0] == b"1-0"
+    assert isinstance(results[1], ConnectionError)
+    assert results[2] == b"3-0"
+
+@pytest.mark.asyncio
+async def test_events_are_serialized_into_the_stream():
+    publisher, pipe = make_publisher()
+    await publisher.publish({"event_id": "e1", "payload": {"user_id": 1}})
+
+    publisher.client.pipeline.assert_called_with(transaction=False)
+    (stream, fields), = pipe.sent
+    assert stream == "events:0"
+    assert json.loads(fields["data"]) == {"event_id": "e1", "payload": {"user_id": 1}}
+
+@pytest.mark.asyncio
+async def test_events_of_a_user_share_a_partition():
+    publisher, pipe = make_publisher()
+    publisher.partitions = 8
+    await asyncio.gather(*(
+        publisher.publish({"event_id": str(i), "payload": {"user_id": f"user{i % 4}"}})
+        for i in range(16)
+    ))
+
+    streams = {}
+    for stream, fields in pipe.sent:
+        user_id = json.loads(fields["data"])["payload"]["user_id"]
+        streams.setdefault(user_id, set()).add(stream)
+    assert all(len(s) == 1 for s in streams.values())
+    assert len(set().union(*streams.values())) > 1
@@ -0,0 +1,82 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.utils.response_cache import ResponseCache, bump_campaigns_version, etag_matches
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+
+@pytest.mark.asyncio
+async def test_respond_caches_until_version_bump():
+    client = FakeRedis()
+    cache = ResponseCache(maxsize=10, ttl=60)
+    build = AsyncMock(return_value=[{"id": 1, "name": "Welcome"}])
+
+    first = await cache.respond(client, "list", None, build)
+    second = await cache.respond(client, "list", None, build)
+    assert first.status_code == second.status_code == 200
+    assert second.body == b'[{"id":1,"name":"Welcome"}]'
+    assert build.await_count == 1
+
+    not_modified = await cache.respond(client, "list", first.headers["etag"], build)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == first.headers["etag"]
+    assert build.await_count == 1
+
+    await bump_campaigns_version(client)
+    await cache.respond(client, "list", None, build)
+    assert build.await_count == 2
+
+@pytest.mark.asyncio
+async def test_shared_cache_fills_other_replicas():
+    client = FakeRedis()
+    build = AsyncMock(return_value={"id": 1})
+    await ResponseCache(maxsize=10, ttl=60, shared=True).respond(client, "campaign:1", None, build)
+
+    response = await ResponseCache(maxsize=10, ttl=60, shared=True).respond(client, "campaign:1", None, build)
+    assert response.body == b'{"id":1}'
+    assert build.await_count == 1
+
+@pytest.mark.asyncio
+async def test_bypasses_cache_without_redis():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    build = AsyncMock(return_value={"id": 1})
+    await cache.respond(None, "campaign:1", None, build)
+    response = await cache.respond(None, "campaign:1", None, build)
+    assert response.status_code == 200
+    assert build.await_count == 2
+
+@pytest.mark.asyncio
+async def test_version_bump_is_retried_apart_from_the_worker_notification(monkeypatch):
+    from api.routers import campaigns
+
+    client = AsyncMock()
+    client.incr.side_effect = [ConnectionError("blip"), 1]
+    client.publish.side_effect = ConnectionError("pubsub down")
+    monkeypatch.setattr(campaigns.publisher, "client", client)
+
+    await campaigns.notify_campaigns_changed()
+
+    assert client.incr.await_count == 2
+    client.publish.assert_awaited_once()
@@ -0,0 +1,62 @@
+import pytest
+
+from common.rule_analysis import RuleValidationError, analyze_rule
+from common.rule_engine import evaluate_rule
+
+def test_and_children_reordered_cheapest_first():
+    rule = {
+        "and": [
+            {"field": "email", "operator": "contains", "value": "example"},
+            {"field": "event_type", "operator": "equals", "value": "purchase"},
+        ]
+    }
+    optimized, plan = analyze_rule(rule)
+
+    assert [child["operator"] for child in optimized["and"]] == ["equals", "contains"]
+    assert plan["op"] == "and"
+    assert plan["children"][0]["cost"] < plan["children"][1]["cost"]
+
+def test_reordering_preserves_result():
+    rule = {
+        "or": [
+            {"field": "user.profile.city", "operator": "contains", "value": "york"},
+            {"not": {"field": "amount", "operator": "between", "value": [10, 20]}},
+            {"field": "category", "operator": "in", "value": ["books", "music"]},
+        ]
+    }
+    optimized, _ = analyze_rule(rule)
+    payloads = [
+        {"user": {"profile": {"city": "New York"}}, "amount": 15},
+        {"amount": 15, "category": "books"},
+        {"amount": 15, "category": "garden"},
+        {"amount": 50},
+    ]
+    for payload in payloads:
+        assert evaluate_rule(payload, optimized) == evaluate_rule(payload, rule)
+
+def test_legacy_shorthand_is_normalized():
+    optimized, _ = analyze_rule({"event_type": "purchase"})
+    assert optimized == {"field": "event_type", "operator": "equals", "value": "purchase"}
+
+@pytest.mark.parametrize("rule", [
+    {"field": "amount", "operator": "greater_or_equal", "value": 3},
+    {"field": "amount", "operator": "equals"},
+    {"field": "amount", "operator": "equals", "value": 1, "feild": "x"},
+    {"field": "amount", "operator": "between", "value": 5},
+    {"and": []},
+    {"and": [{"field": "a", "operator": "equals", "value": 1}], "field": "b"},
+    {"window": {"key": "user_id", "seconds": 60, "operator": "equals", "value": 1,
+                "where": {"window": {"key": "user_id", "seconds": 1}}}},
+    {"window": {"key": "user_id", "seconds": -1, "operator": "equals", "value": 1}},
+    {"window": {"key": "country", "seconds": 60, "operator": "equals", "value": 1}},
+    [],
+])
+def test_invalid_rules_rejected(rule):
+    with pytest.raises(RuleValidationError):
+        analyze_rule(rule)
+
+def test_error_reports_path():
+    rule = {"and": [{"field": "a", "operator": "equals", "value": 1}, {"not": {"field": "b", "operator": "nope", "value": 1}}]}
+    with pytest.raises(RuleValidationError) as exc:
+        analyze_rule(rule)
+    assert exc.value.path == "rules.and[1].not.operator"
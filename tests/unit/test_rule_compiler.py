@@ -0,0 +1,121 @@
+import pytest
+
+from common.keyword_matcher import AhoCorasick, KeywordIndex
+from common.rule_compiler import CompiledRuleSet, EventContext
+from common.rule_engine import evaluate_condition, evaluate_rule
+
+def make_campaign(campaign_id, rules):
+    return type('Campaign', (object,), {'id': campaign_id, 'rules': rules})()
+
+def test_new_string_operators():
+    payload = {"title": "Summer SALE on shoes", "sku": "SHOE-123"}
+    assert evaluate_condition(payload, "title", "contains_any", ["winter", "sale"]) == True
+    assert evaluate_condition(payload, "title", "contains_any", ["winter", "boots"]) == False
+    assert evaluate_condition(payload, "sku", "starts_with", "shoe-") == True
+    assert evaluate_condition(payload, "sku", "starts_with", "boot-") == False
+    assert evaluate_condition(payload, "sku", "regex", r"^SHOE-\d+$") == True
+    assert evaluate_condition(payload, "sku", "regex", r"^shoe-\d+$") == False
+
+def test_aho_corasick_finds_overlapping_keywords():
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+    assert matcher.find_all("ushers") == {"he", "she", "hers"}
+    assert matcher.find_all("xyz") == set()
+
+@pytest.mark.parametrize("keyword_count", [3, 200])
+def test_keyword_campaigns_match_like_interpreter(keyword_count):
+    keywords = [f"term{i}" for i in range(keyword_count)]
+    campaigns = [
+        make_campaign(i, {"field": "text", "operator": "contains", "value": keyword.upper()})
+        for i, keyword in enumerate(keywords)
+    ]
+    campaigns.append(make_campaign(-1, {"field": "text", "operator": "contains_any", "value": ["zzz", "term1"]}))
+    ruleset = CompiledRuleSet(campaigns)
+
+    for text in ["nothing here", "has TERM1 and term2", "term10 overlaps term1"]:
+        payload = {"text": text}
+        expected = [c.id for c in campaigns if evaluate_rule(payload, c.rules)]
+        assert ruleset.match(payload) == expected
+
+def test_compiled_rules_match_interpreter():
+    rules = [
+        {"and": [
+            {"field": "event_type", "operator": "equals", "value": "purchase"},
+            {"field": "amount", "operator": "greater_than", "value": 50},
+        ]},
+        {"or": [
+            {"field": "user.country", "operator": "in", "value": ["US", "CA"]},
+            {"not": {"field": "user.age", "operator": "between", "value": [18, 65]}},
+        ]},
+        {"field": "sku", "operator": "regex", "value": r"\d{3}$"},
+        {"field": "sku", "operator": "starts_with", "value": "ab"},
+    ]
+    campaigns = [make_campaign(i, rule) for i, rule in enumerate(rules)]
+    ruleset = CompiledRuleSet(campaigns)
+    payloads = [
+        {"event_type": "purchase", "amount": 100, "user": {"country": "US", "age": 30}, "sku": "AB-123"},
+        {"event_type": "purchase", "amount": 10, "user": {"country": "FR", "age": 70}, "sku": "x"},
+        {"event_type": "signup", "user": {"country": "FR", "age": 30}},
+        {},
+    ]
+    for payload in payloads:
+        assert ruleset.match(payload) == [c.id for c in campaigns if evaluate_rule(payload, c.rules)]
+
+def test_string_operators_on_numeric_fields_match_interpreter():
+    payload = {"amount": 2.5}
+    rules = [
+        {"field": "amount", "operator": "contains", "value": "2"},
+        {"field": "amount", "operator": "starts_with", "value": "2"},
+        {"field": "amount", "operator": "regex", "value": "2"},
+    ]
+    campaigns = [make_campaign(i, rule) for i, rule in enumerate(rules)]
+    expected = [c.id for c in campaigns if evaluate_rule(payload, c.rules)]
+    assert expected == [0, 1, 2]
+    assert CompiledRuleSet(campaigns).match(payload) == expected
+
+def test_invalid_campaigns_are_skipped_at_compile_time():
+    campaigns = [
+        make_campaign(1, {"field": "a", "operator": "bogus", "value": 1}),
+        make_campaign(2, {"event_type": "purchase"}),
+    ]
+    ruleset = CompiledRuleSet(campaigns)
+    assert list(ruleset.invalid) == [1]
+    assert ruleset.match({"event_type": "purchase"}) == [2]
+
+def test_keyword_index_empty_needle():
+    index = KeywordIndex()
+    for needle in [""] + [f"k{i}" for i in range(10)]:
+        index.add("f", needle)
+    index.build()
+    assert index.find("f", "k3") == {"", "k3"}
+
+def test_identical_conditions_are_shared_across_campaigns():
+    countries = [["US"], ["CA"], ["US", "CA"], ["FR"]]
+    campaigns = [
+        make_campaign(i, {
+            "and": [
+                {"field": "event_type", "operator": "equals", "value": ["purchase", "signup"][i % 2]},
+                {"field": "country", "operator": "in", "value": countries[i % 4]},
+                {"field": "amount", "operator": "greater_than", "value": (i % 5) * 10},
+            ]
+        })
+        for i in range(400)
+    ]
+    ruleset = CompiledRuleSet(campaigns)
+    # 2 event types + 4 country lists + 5 thresholds, plus the 20 repeated and-nodes
+    assert ruleset.shared_nodes == 11 + 20
+
+    payload = {"event_type": "purchase", "country": "US", "amount": 25}
+    assert ruleset.match(payload) == [c.id for c in campaigns if evaluate_rule(payload, c.rules)]
+
+    ctx = EventContext(payload, None, ruleset.keywords, ruleset._nodes)
+    for _, node in ruleset.rules:
+        node(ctx)
+    assert ctx.evaluations <= ruleset.shared_nodes
+
+def test_equal_values_of_different_types_lower_differently():
+    payload = {"flag": "true", "count": "1.0"}
+    assert evaluate_condition(payload, "flag", "contains", True)
+    # Must not reuse the lowered form cached for True
+    assert not evaluate_condition(payload, "flag", "contains", 1)
+    assert evaluate_condition(payload, "count", "contains_any", [1.0])
+    assert not evaluate_condition(payload, "flag", "contains_any", [1])
@@ -0,0 +1,68 @@
+import json
+
+from common.campaign_snapshot import CampaignSnapshot
+from common.rule_compiler import CompiledRuleSet
+from common.rule_engine import match_campaigns_enhanced
+from common.rule_profiler import RuleProfiler, live_reports, merge_stats, top_campaigns
+
+CAMPAIGNS = [
+    CampaignSnapshot(1, {"field": "event_type", "operator": "equals", "value": "purchase"}),
+    CampaignSnapshot(2, {"field": "sku", "operator": "regex", "value": "^SHOE-"}),
+    CampaignSnapshot(3, {"field": "amount", "operator": "greater_than", "value": 10}),
+]
+
+def test_unsampled_events_are_not_recorded():
+    profiler = RuleProfiler(0.01, rng=lambda: 0.5)
+    CompiledRuleSet(CAMPAIGNS).match({"event_type": "purchase"}, profiler=profiler)
+    assert profiler.stats == {}
+
+def test_sampled_event_records_matches_and_errors():
+    profiler = RuleProfiler(1.0)
+    ruleset = CompiledRuleSet(CAMPAIGNS)
+    assert ruleset.match({"event_type": "purchase", "amount": "x"}, profiler=profiler) == [1]
+    ruleset.match({"event_type": "view", "amount": 20}, profiler=profiler)
+
+    report = {row["campaign_id"]: row for row in top_campaigns(profiler.stats, sort="errors")}
+    assert report[1]["samples"] == 2
+    assert report[1]["match_rate"] == 0.5
+    assert report[3]["errors"] == 1
+    assert top_campaigns(profiler.stats, sort="errors")[0]["campaign_id"] == 3
+
+def test_enhanced_matching_is_profiled():
+    profiler = RuleProfiler(1.0)
+    assert match_campaigns_enhanced({"event_type": "purchase"}, CAMPAIGNS, profiler=profiler) == [1]
+    assert set(profiler.stats) == {1, 2, 3}
+
+def test_merge_and_rank_worker_reports():
+    worker_a = {"1": [2, 0.002, 0.0015, 1, 0], "2": [1, 0.010, 0.010, 0, 0]}
+    worker_b = {"1": [2, 0.002, 0.0010, 2, 0]}
+    merged = merge_stats([worker_a, worker_b])
+    assert merged[1] == [4, 0.004, 0.0015, 3, 0]
+
+    top = top_campaigns(merged, n=1)
+    assert [row["campaign_id"] for row in top] == [2]
+    assert top[0]["mean"] == 10.0
+
+def test_stats_age_out_after_two_windows():
+    now = [0.0]
+    profiler = RuleProfiler(1.0, window=60, clock=lambda: now[0])
+    profiler.record(1, 0.001, matched=True)
+
+    now[0] = 61
+    assert profiler.report()[1][0] == 1  # previous window still reported
+    profiler.record(2, 0.001, matched=False)
+
+    now[0] = 122
+    assert set(profiler.report()) == {2}
+    now[0] = 300
+    assert profiler.report() == {}
+
+def test_reports_of_dead_workers_are_stale():
+    raw = {
+        b"worker-a": json.dumps({"at": 1000, "stats": {"1": [1, 0.001, 0.001, 0, 0]}}),
+        b"worker-b": json.dumps({"at": 800, "stats": {"1": [1, 0.001, 0.001, 0, 0]}}),
+        b"worker-c": json.dumps({"1": [1, 0.001, 0.001, 0, 0]}),  # no timestamp
+    }
+    live, stale = live_reports(raw, now=1010, max_age=120)
+    assert len(live) == 1
+    assert sorted(stale) == [b"worker-b", b"worker-c"]
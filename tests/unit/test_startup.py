@@ -0,0 +1,29 @@
+from unittest.mock import patch
+
+import pytest
+
+from common.db import Database
+from common.startup import StartupTracker
+
+def test_phases_are_timed_and_ready_is_explicit():
+    startup = StartupTracker("test")
+    with startup.phase("database"):
+        pass
+    assert not startup.ready
+    assert "database" in startup.phases
+
+    startup.mark_ready()
+    report = startup.report()
+    assert report["ready"] and report["ready_after"] > 0
+
+    startup.event_processed()
+    first = startup.first_event_after
+    startup.event_processed()
+    assert startup.first_event_after == first
+
+def test_database_needs_password_only_when_used():
+    db = Database()
+    with patch("common.config.config.POSTGRES_PASSWORD", None), \
+            patch.dict("os.environ", {}, clear=True):
+        with pytest.raises(ValueError, match="POSTGRES_PASSWORD"):
+            db.engine
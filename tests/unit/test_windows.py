@@ -0,0 +1,116 @@
+import pytest
+
+from common.rule_engine import collect_window_specs, match_campaigns_enhanced, plan_windows, record_windows, update_windows
+from common.windows import SlidingWindowStore, WindowSpec
+
+THIRD_PURCHASE = {
+    "window": {
+        "aggregate": "count",
+        "key": "user_id",
+        "seconds": 86400,
+        "where": {"field": "event_type", "operator": "equals", "value": "purchase"},
+        "operator": "equals",
+        "value": 3,
+    }
+}
+
+BIG_SPENDER = {
+    "window": {
+        "aggregate": "sum",
+        "key": "user_id",
+        "field": "amount",
+        "seconds": 3600,
+        "operator": "greater_than",
+        "value": 500,
+    }
+}
+
+def make_campaign(campaign_id, rules):
+    return type('Campaign', (object,), {'id': campaign_id, 'rules': rules})()
+
+def test_third_purchase_within_window():
+    campaigns = [make_campaign(1, THIRD_PURCHASE)]
+    specs = collect_window_specs(campaigns)
+    store = SlidingWindowStore()
+    purchase = {"event_type": "purchase", "user_id": "u1"}
+
+    matched = []
+    for i in range(4):
+        windows = update_windows(purchase, specs, store, now=1000 + i)
+        matched.append(match_campaigns_enhanced(purchase, campaigns, windows))
+    assert matched == [[], [], [1], []]
+
+    # Another user has their own window
+    windows = update_windows({"event_type": "purchase", "user_id": "u2"}, specs, store, now=1005)
+    assert match_campaigns_enhanced(purchase, campaigns, windows) == []
+
+def test_where_filter_does_not_count_other_events():
+    specs = collect_window_specs([make_campaign(1, THIRD_PURCHASE)])
+    store = SlidingWindowStore()
+
+    update_windows({"event_type": "purchase", "user_id": "u1"}, specs, store, now=0)
+    windows = update_windows({"event_type": "login", "user_id": "u1"}, specs, store, now=1)
+    assert windows[specs[0].id] == 1
+
+def test_window_slides_and_sums():
+    campaigns = [make_campaign(7, BIG_SPENDER)]
+    specs = collect_window_specs(campaigns)
+    store = SlidingWindowStore()
+
+    update_windows({"user_id": 5, "amount": 300}, specs, store, now=0)
+    windows = update_windows({"user_id": 5, "amount": 300}, specs, store, now=1800)
+    assert match_campaigns_enhanced({}, campaigns, windows) == [7]
+
+    # The first purchase has slid out of the hour
+    windows = update_windows({"user_id": 5, "amount": 100}, specs, store, now=3700)
+    assert windows[specs[0].id] == 400
+    assert match_campaigns_enhanced({}, campaigns, windows) == []
+
+def test_identical_windows_share_state():
+    campaigns = [make_campaign(1, THIRD_PURCHASE), make_campaign(2, {"and": [THIRD_PURCHASE]})]
+    assert len(collect_window_specs(campaigns)) == 1
+
+def test_store_bounds_and_expiry():
+    spec = WindowSpec({"key": "user_id", "seconds": 60})
+    store = SlidingWindowStore(max_keys=2)
+
+    store.add(spec, "a", now=0)
+    store.add(spec, "b", now=0)
+    store.add(spec, "c", now=0)
+    assert len(store) == 2
+    assert store.current(spec, "a", now=0) == 0
+
+    assert store.evict_expired(now=120) == 2
+    assert len(store) == 0
+
+def test_checkpoint_round_trip():
+    spec = WindowSpec({"key": "user_id", "seconds": 60})
+    store = SlidingWindowStore()
+    store.add(spec, "a", now=10)
+    store.add(spec, "a", now=20)
+
+    updated, removed = store.drain_changes()
+    assert removed == []
+    assert store.drain_changes() == ({}, [])
+
+    restored = SlidingWindowStore()
+    restored.load({key.encode(): value for key, value in updated.items()})
+    assert restored.current(spec, "a", now=30) == 2
+
+def test_invalid_window_definition():
+    with pytest.raises(ValueError):
+        WindowSpec({"aggregate": "median", "key": "user_id", "seconds": 60})
+    with pytest.raises(ValueError):
+        WindowSpec({"aggregate": "sum", "key": "user_id", "seconds": 60})
+
+def test_plan_does_not_count_until_recorded():
+    specs = collect_window_specs([make_campaign(7, BIG_SPENDER)])
+    store = SlidingWindowStore()
+    update_windows({"user_id": 5, "amount": 300}, specs, store, now=0)
+
+    # A failed commit and its retry plan the same event twice
+    for _ in range(2):
+        windows, additions = plan_windows({"user_id": 5, "amount": 250}, specs, store, now=10)
+        assert windows[specs[0].id] == 550
+    record_windows(additions, store, now=10)
+    assert store.current(specs[0], 5, now=10) == 550
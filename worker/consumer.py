@@ -1,48 +1,352 @@
 import asyncio
 import json
 import os
+import socket
+import time
 
+from prometheus_client import start_http_server
 from redis.asyncio import from_url
+from redis.exceptions import ResponseError
 
-from common.constants import EVENTS_QUEUE
+from common.config import config
+from common.constants import (
+    DEAD_LETTER_QUEUE,
+    EVENTS_CONSUMER_GROUP,
+    EVENTS_QUEUE,
+    LEGACY_DRAIN_LOCK_KEY,
+)
+from common.metrics import registry
+from common.partitions import partition_for, stream_key
+from common.utils import calculate_backoff_delay
+from worker.dispatcher import trigger_dispatcher
+from worker.partitions import PartitionLeaser
 from worker.processor import process_event
+from worker.utils.campaign_cache import campaign_cache, watch_campaign_changes
+from worker.utils.concurrency import OrderedLanes, batch_size, concurrency_limiter
+from worker.utils.debug import install_debug_signals
 from worker.utils.logger import get_logger
+from worker.utils.profiles import profile_enricher
+from worker.utils.rule_profile import publish_rule_profile
+from worker.utils.startup import mark_not_ready, mark_ready, warm_up
+from worker.utils.window_state import (
+    checkpoint_windows,
+    drop_partition_windows,
+    flush_partition_windows,
+    load_partition_windows,
+)
 
 logger = get_logger(__name__)
 
-async def consume_events():
-    REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
-    redis_conn = from_url(REDIS_URL)
+READ_COUNT = 500  # upper bound; the batch read follows the concurrency limit
+READ_BLOCK_MS = 1000
+
+async def ensure_consumer_group(redis_conn, stream):
+    """Create the consumer group (and the stream) if they don't exist yet."""
+    try:
+        await redis_conn.xgroup_create(
+            stream, EVENTS_CONSUMER_GROUP, id="0", mkstream=True
+        )
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
 
-    pubsub = redis_conn.pubsub()
-    await pubsub.subscribe(EVENTS_QUEUE)
+async def dead_letter(redis_conn, stream, message_id, fields, error: Exception) -> bool:
+    """Keep a failed event in the dead-letter stream. Returns False if that failed."""
+    try:
+        await redis_conn.xadd(
+            DEAD_LETTER_QUEUE,
+            {
+                "data": fields.get(b'data', b''),
+                "error": str(error),
+                "stream": stream,
+                "message_id": message_id,
+            },
+            maxlen=config.DEAD_LETTER_MAX_LEN,
+            approximate=True,
+        )
+        return True
+    except Exception as e:
+        logger.error(
+            "Could not dead-letter message %s, leaving it pending: %s", message_id, e
+        )
+        return False
 
-    logger.info(f"Worker consumer started, listening to '{EVENTS_QUEUE}' channel...")
+async def handle_message(redis_conn, stream, message_id, fields, windows):
+    """Process one stream entry within the concurrency limit, then remove it."""
+    async with concurrency_limiter:
+        try:
+            data = json.loads(fields[b'data'].decode('utf-8'))
+            await process_event(data, windows)
+        except Exception as e:
+            logger.error("Error processing message: %s", e)
+            # Continue processing other messages even if one fails, but only
+            # drop the entry once a copy is safe in the dead-letter stream
+            if not await dead_letter(redis_conn, stream, message_id, fields, e):
+                return
+    # Remove handled entries so the stream length reflects the real backlog
+    await redis_conn.xack(stream, EVENTS_CONSUMER_GROUP, message_id)
+    await redis_conn.xdel(stream, message_id)
 
+def message_user_id(fields):
     try:
-        while True:
+        return json.loads(fields[b'data'])['payload'].get('user_id')
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None  # Malformed events fail (and are logged) in process_event
+
+async def prefetch_profiles(user_ids):
+    """Load user profiles for a whole batch of events with one query."""
+    try:
+        known = [user_id for user_id in user_ids if user_id is not None]
+        await profile_enricher.prefetch(known, campaign_cache.ruleset.fields)
+    except Exception as e:
+        # Profiles still cached are used; the rest match without stored attributes
+        logger.warning("Profile prefetch failed: %s", e)
+
+async def read_partition(redis_conn, stream, consumer, last_id, count):
+    response = await redis_conn.xreadgroup(
+        EVENTS_CONSUMER_GROUP,
+        consumer,
+        {stream: last_id},
+        count=count,
+        block=READ_BLOCK_MS if last_id == ">" else None,
+    )
+    return [m for _stream, entries in response or [] for m in entries]
+
+async def consume_batch(
+    redis_conn, stream, consumer, last_id, lanes: OrderedLanes, windows
+):
+    """
+    Read the next entries and hand them to `lanes`, keyed by user_id.
+
+    Returns the id to read from next: while replaying our pending entries it
+    moves past the ones just read (they stay pending until handled), then
+    switches to new entries.
+    """
+    limit = batch_size(READ_COUNT)
+    await lanes.wait_for_room(limit)
+    messages = await read_partition(
+        redis_conn, stream, consumer, last_id, limit - len(lanes)
+    )
+    if last_id != ">":
+        if not messages:
+            return ">"
+        last_id = messages[-1][0]
+    user_ids = [message_user_id(fields) for _message_id, fields in messages]
+    if messages:
+        await prefetch_profiles(user_ids)
+    for (message_id, fields), user_id in zip(messages, user_ids):
+        lanes.submit(
+            user_id, handle_message, redis_conn, stream, message_id, fields, windows
+        )
+    return last_id
+
+async def consume_partition(
+    redis_conn, partition: int, stop: asyncio.Event, leaser: PartitionLeaser
+):
+    """
+    Process one partition's events until `stop` is set or its lease may lapse.
+
+    Events of different users run concurrently within the worker's
+    concurrency limit; each user's events are processed in stream order. The
+    group consumer is named after the partition, not the worker, so entries
+    left unacknowledged by a previous owner are read back first (from id 0)
+    and nothing is skipped or reordered when a partition changes hands. The
+    partition's window state is loaded before its stream is read.
+    """
+    stream = stream_key(partition)
+    consumer = f"partition-{partition}"
+    last_id = "0"  # our pending entries first, then new ones
+    lanes = OrderedLanes()
+    windows = None
+
+    try:
+        while not stop.is_set() and leaser.holds(partition):
             try:
-                message = await pubsub.get_message(ignore_subscribe_messages=True)
-                if message:
-                    try:
-                        data = json.loads(message['data'].decode('utf-8'))
-                        await process_event(data)
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}")
-                        # Continue processing other messages even if one fails
+                if windows is None:
+                    windows = await load_partition_windows(redis_conn, partition)
+                    await ensure_consumer_group(redis_conn, stream)
+                last_id = await consume_batch(
+                    redis_conn, stream, consumer, last_id, lanes, windows
+                )
             except asyncio.TimeoutError:
                 # Redis connection timeout - continue loop
                 continue
             except Exception as e:
-                logger.error(f"Error in consumer loop: {e}")
+                if isinstance(e, ResponseError) and "NOGROUP" in str(e):
+                    # Stream was deleted underneath us; recreate and carry on
+                    await ensure_consumer_group(redis_conn, stream)
+                    continue
+                logger.error(f"Error in partition {partition} consumer: {e}")
                 # Brief pause before retrying
                 await asyncio.sleep(1)
+        # Events not started yet stay pending for the next owner
+        await lanes.drain()
+    finally:
+        lanes.cancel()
+
+async def stop_partitions(
+    redis_conn, leaser: PartitionLeaser, tasks, stops, partitions
+):
+    """
+    Let the consumers of `partitions` finish the events they started, flush
+    their window state and hand the leases back.
+    """
+    for partition in partitions:
+        stops.pop(partition).set()
+    await asyncio.gather(*(tasks.pop(p) for p in partitions), return_exceptions=True)
+    for partition in partitions:
+        if leaser.holds(partition):
+            await flush_partition_windows(redis_conn, partition)
+        else:
+            drop_partition_windows(partition)
+    await leaser.release(partitions)
 
-            await asyncio.sleep(0.1)
+async def fence_partitions(leaser: PartitionLeaser, tasks, stops):
+    """
+    Cancel consumers whose lease may lapse before the next renewal, because
+    it was lost or renewing failed or ran late, so two workers never consume
+    a partition at once. Their window state is dropped: the next owner loads
+    the last checkpoint instead.
+    """
+    fenced = [partition for partition in tasks if not leaser.holds(partition)]
+    if not fenced:
+        return
+    logger.warning(
+        "Lease deadline passed for partitions %s, stopping them", sorted(fenced)
+    )
+    for partition in fenced:
+        stops.pop(partition).set()
+        tasks[partition].cancel()
+    await asyncio.gather(*(tasks.pop(p) for p in fenced), return_exceptions=True)
+    for partition in fenced:
+        drop_partition_windows(partition)
+    try:
+        await leaser.release(fenced)
+    except Exception as e:
+        logger.warning(
+            f"Could not release fenced partitions, leaving them to expire: {e}"
+        )
+
+async def drain_legacy_stream(redis_conn, chunk: int = 1000) -> int:
+    """
+    Move entries left in the unpartitioned `events` stream (written before
+    partitioning) into the partition streams, oldest first, so an upgrade
+    doesn't strand them. One worker does this under a lock; each chunk is
+    moved and deleted in one transaction. Returns the number moved.
+    """
+    if not await redis_conn.set(LEGACY_DRAIN_LOCK_KEY, "1", nx=True, px=60000):
+        return 0
+    moved = 0
+    try:
+        while entries := await redis_conn.xrange(EVENTS_QUEUE, count=chunk):
+            pipe = redis_conn.pipeline(transaction=True)
+            for _message_id, fields in entries:
+                partition = partition_for(
+                    message_user_id(fields), config.EVENT_PARTITIONS
+                )
+                pipe.xadd(stream_key(partition), fields)
+            pipe.xdel(EVENTS_QUEUE, *(message_id for message_id, _fields in entries))
+            pipe.pexpire(LEGACY_DRAIN_LOCK_KEY, 60000)
+            await pipe.execute()
+            moved += len(entries)
+    finally:
+        await redis_conn.delete(LEGACY_DRAIN_LOCK_KEY)
+    if moved:
+        logger.info(
+            f"Moved {moved} events from the unpartitioned stream into partitions"
+        )
+    return moved
+
+async def warm_up_until_ready(redis_conn):
+    """Retry the startup warm-up with backoff until it succeeds."""
+    attempt = 0
+    while True:
+        try:
+            await warm_up(redis_conn)
+            await drain_legacy_stream(redis_conn)
+            return
+        except Exception as e:
+            logger.warning(f"Startup warm-up failed, retrying: {e}")
+            await asyncio.sleep(calculate_backoff_delay(min(attempt, 5), jitter=True))
+            attempt += 1
+
+async def rebalance_partitions(redis_conn, leaser: PartitionLeaser, tasks, stops):
+    """Start consumers for newly leased partitions and stop the ones given up."""
+    acquired, released = await leaser.rebalance()
+    for partition in acquired:
+        stops[partition] = asyncio.Event()
+        tasks[partition] = asyncio.create_task(
+            consume_partition(redis_conn, partition, stops[partition], leaser)
+        )
+    # Lost leases are fenced; the rest finish their events and flush first
+    await fence_partitions(leaser, tasks, stops)
+    if released:
+        running = released & set(tasks)
+        await stop_partitions(redis_conn, leaser, tasks, stops, running)
+        await leaser.release(released - running)
+    if acquired or released:
+        logger.info(
+            "Partitions acquired %s, released %s; now own %s",
+            sorted(acquired), sorted(released), sorted(leaser.owned),
+        )
+
+async def run_periodic(
+    redis_conn, worker_name, leaser: PartitionLeaser, last_run: dict[str, float]
+):
+    """Checkpoint windows and publish the rule profile when they are due."""
+    if time.monotonic() - last_run["checkpoint"] >= config.WINDOW_CHECKPOINT_INTERVAL:
+        await checkpoint_windows(
+            redis_conn, [p for p in leaser.owned if leaser.holds(p)]
+        )
+        last_run["checkpoint"] = time.monotonic()
+    if time.monotonic() - last_run["profile"] >= config.RULE_PROFILE_INTERVAL:
+        await publish_rule_profile(redis_conn, worker_name)
+        last_run["profile"] = time.monotonic()
+
+async def consume_events():
+    REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+    redis_conn = from_url(REDIS_URL)
+    worker_name = f"{socket.gethostname()}-{os.getpid()}"
+    leaser = PartitionLeaser(
+        redis_conn, worker_name, config.EVENT_PARTITIONS, config.PARTITION_LEASE_TTL
+    )
+    tasks: dict[int, asyncio.Task] = {}
+    stops: dict[int, asyncio.Event] = {}
+
+    install_debug_signals()
+    if config.WORKER_METRICS_PORT:
+        # Served from a background thread, so it answers during warm-up too
+        start_http_server(config.WORKER_METRICS_PORT, registry=registry)
+    campaign_cache.redis = redis_conn
+    await warm_up_until_ready(redis_conn)
+    await trigger_dispatcher.start()
+    watcher = asyncio.create_task(watch_campaign_changes(redis_conn))
+    mark_ready()
+    last_run = dict.fromkeys(("checkpoint", "profile"), time.monotonic())
+
+    logger.info(
+        f"Worker consumer started as {worker_name}, "
+        f"sharing {config.EVENT_PARTITIONS} event partitions"
+    )
+
+    try:
+        while True:
+            try:
+                await rebalance_partitions(redis_conn, leaser, tasks, stops)
+                await run_periodic(redis_conn, worker_name, leaser, last_run)
+            except Exception as e:
+                logger.error(f"Error in consumer loop: {e}")
+                # Renewal may not have happened: don't outlive the leases
+                await fence_partitions(leaser, tasks, stops)
+            await asyncio.sleep(leaser.interval)
 
     except asyncio.CancelledError:
         logger.info("Worker consumer stopped.")
-        await pubsub.unsubscribe(EVENTS_QUEUE)
+        mark_not_ready()
+        watcher.cancel()
+        await stop_partitions(redis_conn, leaser, tasks, stops, list(tasks))
+        await leaser.leave()
+        await trigger_dispatcher.close()
         raise
     except Exception as e:
         logger.error(f"Consumer loop crashed: {e}")
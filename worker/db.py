@@ -1,18 +1,6 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from common.db import Database
 
-from common.config import config
+# Engine and pool are created on first use (or in the startup warm-up)
+db = Database()
 
-DATABASE_URL = config.database_url
-
-engine = create_async_engine(DATABASE_URL, echo=True)
-
-async_session = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
-
-async def get_session():
-    async with async_session() as session:
-        yield session
+get_session = db.session
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from common.config import config
+from common.constants import MAX_RETRY_ATTEMPTS, RETRY_BACKOFF_FACTOR
+from common.metrics import (
+    trigger_batch_size,
+    trigger_delivery_seconds,
+    trigger_notifications_total,
+)
+from common.utils import calculate_backoff_delay
+from worker.utils.logger import get_logger
+
+if TYPE_CHECKING:
+    import httpx  # imported on start, only when a webhook is configured
+
+logger = get_logger(__name__)
+
+def parse_routes(routes: str) -> Dict[int, str]:
+    """Parse "campaign_id=url,..." into a campaign -> webhook URL mapping."""
+    parsed = {}
+    for route in routes.split(","):
+        if "=" not in route:
+            continue
+        campaign_id, url = route.split("=", 1)
+        parsed[int(campaign_id.strip())] = url.strip()
+    return parsed
+
+
+class _Sink:
+    """Outbound queue and concurrency limit for one webhook URL."""
+
+    def __init__(self, url: str, queue_size: int, concurrency: int):
+        self.url = url
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.batch: list[dict] = []
+        self.task: Optional[asyncio.Task] = None
+
+
+class TriggerDispatcher:
+    """
+    Delivers campaign trigger notifications to webhook sinks.
+
+    `enqueue` only appends to an in-memory queue per sink and never waits, so
+    the matching path is not slowed down by delivery. One background task per
+    sink coalesces queued notifications into batches of up to `batch_size`
+    (waiting at most `linger` seconds for a batch to fill) and POSTs each batch
+    as a single request, grouped by campaign. At most `concurrency` requests
+    are in flight per sink, over a shared pooled HTTP client. Failed requests
+    (transport errors, 429, 5xx) are retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        default_url: str = "",
+        routes: Optional[Dict[int, str]] = None,
+        batch_size: int = 100,
+        linger: float = 0.05,
+        concurrency: int = 4,
+        queue_size: int = 10000,
+        timeout: float = 5.0,
+        max_attempts: int = MAX_RETRY_ATTEMPTS,
+        retry_base_delay: float = RETRY_BACKOFF_FACTOR,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        self.default_url = default_url
+        self.routes = routes or {}
+        self.batch_size = batch_size
+        self.linger = linger
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self._transport = transport
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._sinks: Dict[str, _Sink] = {}
+        self._inflight: set = set()
+
+    def sink_url(self, campaign_id: int) -> str:
+        return self.routes.get(campaign_id, self.default_url)
+
+    async def start(self):
+        urls = {url for url in [self.default_url, *self.routes.values()] if url}
+        if not urls:
+            logger.info("No trigger webhook configured, trigger delivery disabled")
+            return
+
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency * len(urls),
+                max_keepalive_connections=self.concurrency * len(urls),
+            ),
+            transport=self._transport,
+        )
+        for url in urls:
+            sink = _Sink(url, self.queue_size, self.concurrency)
+            sink.task = asyncio.create_task(self._run(sink))
+            self._sinks[url] = sink
+        logger.info(f"Trigger dispatcher started for {len(urls)} sink(s)")
+
+    def enqueue(self, event_id: str, payload: Dict[str, Any], campaign_ids: list[int]):
+        """Queue one notification per triggered campaign without blocking."""
+        for campaign_id in campaign_ids:
+            sink = self._sinks.get(self.sink_url(campaign_id))
+            if sink is None:
+                continue
+            notification = {
+                "campaign_id": campaign_id,
+                "event_id": event_id,
+                "user_id": payload.get("user_id"),
+                "event_type": payload.get("event_type"),
+                "triggered_at": time.time(),
+            }
+            try:
+                sink.queue.put_nowait(notification)
+            except asyncio.QueueFull:
+                trigger_notifications_total.labels(status="dropped").inc()
+
+    async def _run(self, sink: _Sink):
+        loop = asyncio.get_running_loop()
+        while True:
+            sink.batch = [await sink.queue.get()]
+            deadline = loop.time() + self.linger
+            while len(sink.batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    sink.batch.append(
+                        await asyncio.wait_for(sink.queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            await sink.semaphore.acquire()
+            batch, sink.batch = sink.batch, []
+            self._spawn(sink, batch)
+
+    def _spawn(self, sink: _Sink, batch: list[dict]):
+        task = asyncio.create_task(self._deliver(sink, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, sink: _Sink, batch: list[dict]):
+        import httpx
+
+        client = self._client
+        try:
+            if client is None:
+                return  # Sinks only exist once start() created the client
+            by_campaign: Dict[int, list[dict]] = {}
+            for notification in batch:
+                by_campaign.setdefault(notification["campaign_id"], []).append(
+                    notification
+                )
+            body = {
+                "triggers": [
+                    {"campaign_id": campaign_id, "events": notifications}
+                    for campaign_id, notifications in by_campaign.items()
+                ]
+            }
+            trigger_batch_size.observe(len(batch))
+
+            error: Any = None
+            for attempt in range(self.max_attempts):
+                try:
+                    start = time.perf_counter()
+                    response = await client.post(sink.url, json=body)
+                    trigger_delivery_seconds.observe(time.perf_counter() - start)
+                    if response.status_code < 400:
+                        trigger_notifications_total.labels(status="delivered").inc(
+                            len(batch)
+                        )
+                        return
+                    error = f"HTTP {response.status_code}"
+                    if response.status_code < 500 and response.status_code != 429:
+                        break  # Client errors won't succeed on retry
+                except httpx.HTTPError as e:
+                    error = e
+
+                if attempt < self.max_attempts - 1:
+                    await asyncio.sleep(
+                        calculate_backoff_delay(
+                            attempt, self.retry_base_delay, jitter=True
+                        )
+                    )
+
+            trigger_notifications_total.labels(status="failed").inc(len(batch))
+            logger.error(
+                f"Delivery of {len(batch)} triggers to {sink.url} failed: {error}"
+            )
+        finally:
+            sink.semaphore.release()
+
+    async def close(self):
+        """Stop the batching tasks and deliver everything still queued."""
+        for sink in self._sinks.values():
+            sink.task.cancel()
+        await asyncio.gather(
+            *(sink.task for sink in self._sinks.values()), return_exceptions=True
+        )
+
+        for sink in self._sinks.values():
+            remaining = sink.batch
+            while not sink.queue.empty():
+                remaining.append(sink.queue.get_nowait())
+            for i in range(0, len(remaining), self.batch_size):
+                await sink.semaphore.acquire()
+                self._spawn(sink, remaining[i:i + self.batch_size])
+
+        await asyncio.gather(*list(self._inflight), return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+        self._sinks.clear()
+
+
+trigger_dispatcher = TriggerDispatcher(
+    default_url=config.TRIGGER_WEBHOOK_URL,
+    routes=parse_routes(config.TRIGGER_WEBHOOK_ROUTES),
+    batch_size=config.TRIGGER_BATCH_SIZE,
+    linger=config.TRIGGER_BATCH_LINGER_MS / 1000,
+    concurrency=config.TRIGGER_SINK_CONCURRENCY,
+    queue_size=config.TRIGGER_QUEUE_SIZE,
+    timeout=config.TRIGGER_TIMEOUT,
+)
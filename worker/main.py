@@ -1,10 +1,13 @@
+# Imported first: startup timings are measured from here
+import common.startup  # noqa: F401
+
 import asyncio
-import logging
 
+from common.logger import setup_logging
 from worker.consumer import consume_events
 
 # Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+setup_logging()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,130 @@
+import time
+
+from common.constants import PARTITION_LEASE_PREFIX, PARTITION_MEMBERS_KEY
+from common.metrics import partition_rebalances_total, worker_partitions_owned
+from common.partitions import assign_partitions
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Extend / delete a lease only while we still hold it
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class PartitionLeaser:
+    """
+    Lease-based assignment of event partitions to workers.
+
+    Workers heartbeat into a sorted set of members; each computes the same
+    round-robin assignment from the live members and tries to hold a Redis
+    lease (`SET NX PX`) on each partition assigned to it. A partition is only
+    processed while its lease is held, so when replicas join or leave the
+    previous owner stops and releases it before the new owner can take over.
+    Leases of crashed workers expire after `lease_ttl` seconds.
+
+    `rebalance` must be called more often than `lease_ttl` (every third of it
+    by default); it returns the partitions to start and to stop. Each lease
+    also has a local deadline, counted from before the request that set or
+    renewed it: `holds` turns False a renewal interval ahead of it, so a
+    consumer can be stopped before the lease could have expired even when
+    renewals fail or run late.
+    """
+
+    def __init__(self, redis_conn, name: str, partitions: int, lease_ttl: float):
+        self.redis = redis_conn
+        self.name = name
+        self.partitions = partitions
+        self.lease_ttl = lease_ttl
+        self.owned: set[int] = set()
+        self._deadlines: dict[int, float] = {}
+        self._renew = redis_conn.register_script(_RENEW)
+        self._release = redis_conn.register_script(_RELEASE)
+
+    @property
+    def interval(self) -> float:
+        return self.lease_ttl / 3
+
+    def holds(self, partition: int) -> bool:
+        """Whether the lease on `partition` is certainly ours for another interval."""
+        return time.monotonic() < self._deadlines.get(partition, 0) - self.interval
+
+    def _lease_key(self, partition: int) -> str:
+        return f"{PARTITION_LEASE_PREFIX}{partition}"
+
+    async def members(self) -> list[str]:
+        """Heartbeat and return the names of live workers."""
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(PARTITION_MEMBERS_KEY, {self.name: now})
+        pipe.zremrangebyscore(PARTITION_MEMBERS_KEY, "-inf", now - self.lease_ttl)
+        pipe.zrange(PARTITION_MEMBERS_KEY, 0, -1)
+        *_, members = await pipe.execute()
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    async def rebalance(self) -> tuple[set[int], set[int]]:
+        """
+        Renew held leases and work out which partitions to start and stop.
+
+        Returns:
+            (partitions to start, partitions to stop); stopped partitions must
+            be handed back with `release` once their consumer has finished
+        """
+        ttl_ms = int(self.lease_ttl * 1000)
+        assignment = assign_partitions(await self.members(), self.partitions)
+        desired = assignment.get(self.name, set())
+
+        lost = set()
+        for partition in sorted(self.owned):
+            started = time.monotonic()
+            if await self._renew(
+                keys=[self._lease_key(partition)], args=[self.name, ttl_ms]
+            ):
+                self._deadlines[partition] = started + self.lease_ttl
+            else:
+                lost.add(partition)
+                self._deadlines.pop(partition, None)
+        if lost:
+            # Expired (e.g. a long pause) and possibly taken by another worker
+            logger.warning("Lost partition leases %s", sorted(lost))
+            partition_rebalances_total.labels(action="lost").inc(len(lost))
+            self.owned -= lost
+
+        acquired = set()
+        for partition in sorted(desired - self.owned):
+            started = time.monotonic()
+            if await self.redis.set(
+                self._lease_key(partition), self.name, nx=True, px=ttl_ms
+            ):
+                acquired.add(partition)
+                self._deadlines[partition] = started + self.lease_ttl
+        if acquired:
+            partition_rebalances_total.labels(action="acquired").inc(len(acquired))
+            self.owned |= acquired
+
+        worker_partitions_owned.set(len(self.owned))
+        return acquired, lost | (self.owned - desired)
+
+    async def release(self, partitions) -> None:
+        """Give up leases after their consumers stopped."""
+        for partition in partitions:
+            self._deadlines.pop(partition, None)
+            await self._release(keys=[self._lease_key(partition)], args=[self.name])
+            if partition in self.owned:
+                self.owned.discard(partition)
+                partition_rebalances_total.labels(action="released").inc()
+        worker_partitions_owned.set(len(self.owned))
+
+    async def leave(self) -> None:
+        """Release everything and drop out of the member set (on shutdown)."""
+        await self.release(list(self.owned))
+        await self.redis.zrem(PARTITION_MEMBERS_KEY, self.name)
@@ -1,17 +1,28 @@
 import json
 import time
 
-from sqlalchemy import select
 from sqlalchemy.sql import func
 
-from api.models import Campaign, Event
-from common.constants import DEAD_LETTER_QUEUE
+from api.models import Event
 from common.utils import retry_with_backoff
 from worker.db import get_session
+from worker.dispatcher import trigger_dispatcher
+from worker.utils.campaign_cache import campaign_cache
+from worker.utils.concurrency import concurrency_limiter
 from worker.utils.idempotency import is_event_processed
 from worker.utils.logger import get_logger
-from common.rule_engine import match_campaigns_enhanced
-from common.metrics import events_processed_total, events_processing_time_seconds, idempotent_event_skips_total, dead_letters_total
+from worker.utils.profiles import profile_enricher
+from worker.utils.rule_profile import rule_profiler
+from worker.utils.startup import worker_startup
+from common.rule_engine import plan_windows, record_windows
+from common.windows import SlidingWindowStore
+from common.metrics import (
+    events_processed_total,
+    events_processing_time_seconds,
+    idempotent_event_skips_total,
+    dead_letters_total,
+    worker_commit_latency_seconds,
+)
 
 logger = get_logger(__name__)
 
@@ -27,56 +38,96 @@ def match_campaigns(payload: dict, campaigns):
             matches.append(campaign.id)
     return matches
 
-async def process_event_core(event: dict):
-    """Core event processing logic with error handling."""
+async def process_event_core(event: dict, store: SlidingWindowStore):
+    """
+    Core event processing logic with error handling; `store` holds the
+    event's partition windows.
+    """
     start_time = time.time()
     event_id = event['event_id']
     payload = event['payload']
 
-    logger.info(f"Processing event {event_id}")
+    logger.info("Processing event %s", event_id)
 
     if await is_event_processed(event_id):
         idempotent_event_skips_total.inc()
-        logger.info(f"Event {event_id} already processed, skipping")
+        logger.info("Event %s already processed, skipping", event_id)
         return
 
     async with get_session() as session:
-        # Fetch all campaigns
-        result = await session.execute(select(Campaign))
-        campaigns = result.scalars().all()
+        # Compiled rules for all campaigns, reloaded every CAMPAIGN_CACHE_TTL seconds
+        ruleset = await campaign_cache.get(session)
+
+        # Add stored user attributes read by `user.*` rule fields (prefetched per
+        # batch by the consumer)
+        enriched = profile_enricher.enrich(payload)
+
+        # Per-key windows (e.g. purchases per user in 24h) used by rules, as
+        # they'll be with this event; it is only added to them once stored
+        event_time = time.time()
+        windows, window_additions = plan_windows(
+            enriched, ruleset.window_specs, store, event_time
+        )
 
-        # Match campaigns using enhanced rule engine
-        triggered_ids = match_campaigns_enhanced(payload, campaigns)
+        # Match campaigns using the compiled rule engine
+        matched_ids = ruleset.match(enriched, windows, rule_profiler)
+
+        # Enforce max_triggers across all workers (undone below if the event
+        # isn't stored)
+        triggered_ids = await campaign_cache.apply_caps(matched_ids)
 
         # Save event
+        user_id = payload.get("user_id")
         db_event = Event(
             event_id=event_id,
+            event_type=payload.get("event_type"),
+            user_id=str(user_id) if user_id is not None else None,
             payload=payload,
             campaign_triggers=triggered_ids,
             processed_at=func.now()
         )
 
         session.add(db_event)
-        await session.commit()
+        # Commit latency and failures drive the adaptive concurrency limit
+        commit_start = time.perf_counter()
+        try:
+            await session.commit()
+        except Exception:
+            concurrency_limiter.observe(time.perf_counter() - commit_start, error=True)
+            await campaign_cache.release_caps(matched_ids)
+            raise
+        commit_latency = time.perf_counter() - commit_start
+        worker_commit_latency_seconds.observe(commit_latency)
+        concurrency_limiter.observe(commit_latency)
+
+        # Stored: only now does the event count towards its windows
+        record_windows(window_additions, store, event_time)
+
+        # Hand triggers to the webhook dispatcher; delivery happens in the background
+        trigger_dispatcher.enqueue(event_id, payload, triggered_ids)
 
         # Track successful processing
         processing_time = time.time() - start_time
         events_processing_time_seconds.observe(processing_time)
         events_processed_total.labels(status="success").inc()
+        worker_startup.event_processed()
 
-        logger.info(f"Event {event_id} processed successfully. Triggered campaigns: {triggered_ids}")
+        logger.info(
+            "Event %s processed successfully. Triggered campaigns: %s",
+            event_id,
+            triggered_ids,
+        )
 
 async def send_to_dlq(event: dict, error: Exception):
-    """Send failed event to dead letter queue for later investigation."""
+    """Record a failed event; the consumer copies it to the dead-letter stream."""
     dead_letters_total.inc()
-    # TODO: Actually send to Redis DLQ channel - for now just log
     logger.error(f"Event {event['event_id']} failed: {error}")
 
-async def process_event(event: dict):
+async def process_event(event: dict, store: SlidingWindowStore):
     """Process event with retry logic and DLQ."""
     try:
         await retry_with_backoff(
-            lambda: process_event_core(event)
+            lambda: process_event_core(event, store)
         )
     except Exception as e:
         logger.error(f"Event {event['event_id']} failed after all retries: {e}")
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+from sqlalchemy import func, or_, select
+
+from api.models import Campaign
+from common.active_set import ActiveSet
+from common.campaign_snapshot import build_snapshot
+from common.config import config
+from common.constants import CAMPAIGN_TRIGGER_COUNT_PREFIX, CAMPAIGNS_CHANGED_CHANNEL
+from common.metrics import (
+    campaign_cap_rejections_total,
+    campaigns_active,
+    rule_nodes_shared,
+)
+from common.rule_compiler import CompiledRuleSet
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class CampaignCache:
+    """
+    Compiled campaign rules shared by all events.
+
+    Campaigns are loaded and compiled at most once per `ttl` seconds instead of
+    being queried and re-interpreted for every event, or right after the API
+    announces a change (`watch_campaign_changes`). Only the columns the
+    worker needs are selected, into a compact CampaignSnapshot tuple rather
+    than ORM instances, and the new rule set replaces the old one in a single
+    assignment. Campaigns that already ended are not loaded at all.
+
+    Between reloads an ActiveSet tracks `starts_at`/`ends_at`, so campaigns
+    enter and leave the matched set exactly at their boundaries. `max_triggers`
+    is enforced globally with one Redis counter per capped campaign.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.redis = None
+        self.ruleset = CompiledRuleSet([])
+        self.active = ActiveSet([], time.time())
+        self.caps: dict[int, int] = {}
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.ttl
+
+    async def get(self, session) -> CompiledRuleSet:
+        if self.is_stale():
+            async with self._lock:
+                # Another event may have reloaded while we waited
+                if self.is_stale():
+                    await self._load(session)
+        elif self.active.advance(time.time()):
+            self._activate()
+        return self.ruleset
+
+    async def _load(self, session):
+        result = await session.execute(
+            select(
+                Campaign.id,
+                Campaign.rules,
+                Campaign.starts_at,
+                Campaign.ends_at,
+                Campaign.max_triggers,
+            ).where(or_(Campaign.ends_at.is_(None), Campaign.ends_at > func.now()))
+        )
+        snapshot = build_snapshot(result.all())
+        ruleset = CompiledRuleSet(snapshot)
+        active = ActiveSet(snapshot, time.time())
+        caps = {c.id: c.max_triggers for c in snapshot if c.max_triggers is not None}
+
+        # Campaigns that hit their cap before this load stay off
+        if caps and self.redis is not None:
+            ids = list(caps)
+            keys = [f"{CAMPAIGN_TRIGGER_COUNT_PREFIX}{i}" for i in ids]
+            counts = await self.redis.mget(keys)
+            for campaign_id, count in zip(ids, counts):
+                if count is not None and int(count) >= caps[campaign_id]:
+                    active.exhaust(campaign_id)
+
+        self.ruleset, self.active, self.caps = ruleset, active, caps
+        self._activate()
+        self._loaded_at = time.monotonic()
+        rule_nodes_shared.set(self.ruleset.shared_nodes)
+        logger.info(
+            f"Compiled {len(snapshot)} campaigns into "
+            f"{self.ruleset.shared_nodes} shared rule nodes, {len(self.active)} active"
+        )
+
+    def _activate(self):
+        self.ruleset.set_active(self.active.active)
+        campaigns_active.set(len(self.active))
+
+    async def apply_caps(self, triggered_ids: list[int]) -> list[int]:
+        """
+        Count triggers of capped campaigns and drop the ones over their cap.
+
+        Counters are incremented atomically in one pipelined round trip, so the
+        cap holds across all worker processes. A campaign is exhausted locally
+        as soon as its counter reaches the cap.
+        """
+        capped = [i for i in triggered_ids if i in self.caps]
+        if not capped or self.redis is None:
+            return triggered_ids
+
+        pipe = self.redis.pipeline(transaction=False)
+        for campaign_id in capped:
+            pipe.incr(f"{CAMPAIGN_TRIGGER_COUNT_PREFIX}{campaign_id}")
+        counts = dict(zip(capped, await pipe.execute()))
+
+        allowed = []
+        exhausted = False
+        for campaign_id in triggered_ids:
+            count = counts.get(campaign_id)
+            if count is None:
+                allowed.append(campaign_id)
+                continue
+            cap = self.caps[campaign_id]
+            if count <= cap:
+                allowed.append(campaign_id)
+            else:
+                campaign_cap_rejections_total.inc()
+            if count >= cap:
+                exhausted = self.active.exhaust(campaign_id) or exhausted
+        if exhausted:
+            self._activate()
+        return allowed
+
+    async def release_caps(self, triggered_ids: list[int]) -> None:
+        """
+        Undo the counting done by `apply_caps` for triggers that were not
+        stored (the commit failed), so retries don't use up the cap.
+        Campaigns exhausted locally stay off until the next reload re-reads
+        the counters.
+        """
+        capped = [i for i in triggered_ids if i in self.caps]
+        if not capped or self.redis is None:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for campaign_id in capped:
+            pipe.decr(f"{CAMPAIGN_TRIGGER_COUNT_PREFIX}{campaign_id}")
+        try:
+            await pipe.execute()
+        except Exception as e:
+            # Don't hide the commit error; the cap is just reached a bit early
+            logger.warning(f"Could not release trigger caps {capped}: {e}")
+
+    def invalidate(self):
+        self._loaded_at = float("-inf")
+
+campaign_cache = CampaignCache(config.CAMPAIGN_CACHE_TTL)
+
+async def watch_campaign_changes(redis_conn):
+    """Invalidate the cache whenever the API announces campaign changes."""
+    while True:
+        pubsub = redis_conn.pubsub()
+        try:
+            await pubsub.subscribe(CAMPAIGNS_CHANGED_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    campaign_cache.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Changes made meanwhile are still picked up by the TTL reload
+            logger.warning(f"Campaign change subscription failed, resubscribing: {e}")
+            campaign_cache.invalidate()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
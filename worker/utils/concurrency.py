@@ -0,0 +1,76 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Optional
+
+from common.concurrency import AIMDLimiter
+from common.config import config
+
+concurrency_limiter = AIMDLimiter(
+    initial=config.WORKER_CONCURRENCY,
+    min_limit=config.WORKER_MIN_CONCURRENCY,
+    max_limit=config.WORKER_MAX_CONCURRENCY,
+    target_latency=config.WORKER_TARGET_COMMIT_LATENCY,
+    window=config.WORKER_LIMIT_WINDOW,
+)
+
+def batch_size(max_count: int) -> int:
+    """Stream entries to read at once for the current limit."""
+    per_limit = concurrency_limiter.limit * config.WORKER_BATCH_PER_SLOT
+    return max(1, min(max_count, per_limit))
+
+class OrderedLanes:
+    """
+    Runs jobs concurrently across keys but one at a time, in submission order,
+    within a key.
+
+    A partition's events go in keyed by user_id: events of different users
+    overlap (bounded by the concurrency limit), while each user's events are
+    still processed in stream order.
+    """
+
+    def __init__(self):
+        self.tasks: set[asyncio.Task] = set()
+        self._tails: dict[Hashable, asyncio.Task] = {}
+        self._waiting: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def submit(
+        self, key: Hashable, job: Callable[..., Awaitable], *args
+    ) -> asyncio.Task:
+        """Schedule `job(*args)` after every job submitted before it under `key`."""
+        task = asyncio.create_task(self._run_after(self._tails.get(key), job, args))
+        self._tails[key] = task
+        self.tasks.add(task)
+        self._waiting.add(task)
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    async def _run_after(self, previous: Optional[asyncio.Task], job, args):
+        if previous is not None:
+            # Runs regardless of how the previous job ended
+            await asyncio.wait([previous])
+        self._waiting.discard(asyncio.current_task())
+        await job(*args)
+
+    def _finished(self, key, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        self._waiting.discard(task)
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def wait_for_room(self, limit: int) -> None:
+        """Wait until fewer than `limit` jobs are queued or running."""
+        while len(self.tasks) >= limit:
+            await asyncio.wait(self.tasks, return_when=asyncio.FIRST_COMPLETED)
+
+    async def drain(self) -> None:
+        """Drop jobs that haven't started yet and wait for the running ones."""
+        for task in self._waiting:
+            task.cancel()
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+
+    def cancel(self) -> None:
+        for task in self.tasks:
+            task.cancel()
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import os
+import signal
+import time
+
+from common.config import config
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_tasks: set = set()
+
+def _path(suffix: str) -> str:
+    os.makedirs(config.DEBUG_PROFILE_DIR, exist_ok=True)
+    name = f"worker-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.{suffix}"
+    return os.path.join(config.DEBUG_PROFILE_DIR, name)
+
+async def write_cpu_profile(seconds: float) -> str:
+    """Sample the worker for `seconds` and write a collapsed-stack file."""
+    from common.debug_profiler import format_collapsed, sample_stacks
+
+    stacks = await asyncio.to_thread(sample_stacks, seconds)
+    path = _path("collapsed")
+    with open(path, "w") as f:
+        f.write(format_collapsed(stacks))
+    logger.info("Wrote CPU profile to %s", path)
+    return path
+
+async def write_heap_snapshot() -> str:
+    """Write the heap growth since the previous snapshot as JSON."""
+    from common.debug_profiler import heap_tracker
+
+    report = await asyncio.to_thread(heap_tracker.snapshot)
+    path = _path("heap.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Wrote heap snapshot to %s", path)
+    return path
+
+def _spawn(coro) -> None:
+    task = asyncio.ensure_future(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+def install_debug_signals() -> None:
+    """
+    SIGUSR1 writes a CPU profile, SIGUSR2 a heap snapshot, to DEBUG_PROFILE_DIR.
+
+    e.g. `docker-compose exec worker kill -USR1 1`
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(
+            signal.SIGUSR1,
+            lambda: _spawn(write_cpu_profile(config.DEBUG_PROFILE_SECONDS)),
+        )
+        loop.add_signal_handler(signal.SIGUSR2, lambda: _spawn(write_heap_snapshot()))
+    except (NotImplementedError, AttributeError):
+        logger.warning("Debug profiling signals are not supported on this platform")
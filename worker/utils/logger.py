@@ -1,6 +1,3 @@
-import logging
+from common.logger import get_logger
 
-from logging import getLogger
-
-def get_logger(name):
-    return getLogger(name)
+__all__ = ["get_logger"]
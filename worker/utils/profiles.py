@@ -0,0 +1,104 @@
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select
+
+from api.models import UserProfile
+from common.config import config
+from common.constants import PROFILE_FIELD_PREFIX
+from common.metrics import (
+    profile_cache_hits_total,
+    profile_cache_misses_total,
+    profile_enrichment_seconds,
+    profile_fetch_seconds,
+)
+from common.ttl_cache import TTLCache
+from worker.db import get_session
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def profile_attributes(fields: Iterable[str]) -> frozenset:
+    """Top-level profile attributes read by rule fields such as `user.age`."""
+    return frozenset(
+        field[len(PROFILE_FIELD_PREFIX):].split(".", 1)[0]
+        for field in fields
+        if field.startswith(PROFILE_FIELD_PREFIX)
+        and len(field) > len(PROFILE_FIELD_PREFIX)
+    )
+
+class ProfileEnricher:
+    """
+    Merges stored user attributes into payloads before rules are matched.
+
+    `prefetch` loads the profiles of a whole batch of events with one bulk
+    query, selecting only the attributes referenced by active rules, into a
+    bounded TTL LRU cache. `enrich` is then a dict lookup per event. Users
+    without a profile are cached too, so they don't hit the database again
+    until the entry expires. Attributes the client embedded under `user`
+    take precedence over stored ones.
+
+    Each entry records which attributes it was loaded with. When active rules
+    start referencing new attributes, entries are topped up on their next
+    prefetch instead of being dropped, so events prefetched earlier and still
+    queued are enriched from what was loaded for them.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize, ttl)
+        self.attributes: frozenset = frozenset()
+
+    def _covers(self, user_id: str, attributes: frozenset) -> bool:
+        entry = self.cache.get(user_id)
+        return entry is not None and attributes <= entry[0]
+
+    async def prefetch(self, user_ids: Iterable[Any], fields: Iterable[str]) -> None:
+        """
+        Load missing profiles (or missing attributes of cached ones) for
+        `user_ids` in one query.
+        """
+        attributes = self.attributes = profile_attributes(fields)
+        if not attributes:
+            return
+        requested = {str(u) for u in user_ids if u is not None}
+        missing = [u for u in requested if not self._covers(u, attributes)]
+        profile_cache_hits_total.inc(len(requested) - len(missing))
+        if not missing:
+            return
+
+        profile_cache_misses_total.inc(len(missing))
+        columns = sorted(attributes)
+        start = time.perf_counter()
+        async with get_session() as session:
+            result = await session.execute(
+                select(
+                    UserProfile.user_id, *(UserProfile.attributes[a] for a in columns)
+                ).where(UserProfile.user_id.in_(missing))
+            )
+            rows = result.all()
+        profile_fetch_seconds.observe(time.perf_counter() - start)
+
+        found = {row[0]: row[1:] for row in rows}
+        for user_id in missing:
+            loaded, profile = self.cache.get(user_id) or (frozenset(), {})
+            values = dict(zip(columns, found.get(user_id, ())))
+            profile = {a: v for a, v in {**profile, **values}.items() if v is not None}
+            self.cache.set(user_id, (loaded | attributes, profile))
+
+    def enrich(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Return `payload` with the cached profile under `user`; never modifies it."""
+        if not self.attributes or payload.get("user_id") is None:
+            return payload
+        start = time.perf_counter()
+        entry: Optional[tuple] = self.cache.get(str(payload["user_id"]))
+        if entry is None:
+            # Not prefetched (or expired since); match without stored attributes
+            return payload
+        profile = entry[1]
+        embedded = payload.get("user")
+        if profile and (embedded is None or isinstance(embedded, dict)):
+            payload = {**payload, "user": {**profile, **(embedded or {})}}
+        profile_enrichment_seconds.observe(time.perf_counter() - start)
+        return payload
+
+profile_enricher = ProfileEnricher(config.PROFILE_CACHE_SIZE, config.PROFILE_CACHE_TTL)
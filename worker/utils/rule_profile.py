@@ -0,0 +1,36 @@
+import json
+import time
+
+from common.config import config
+from common.constants import RULE_PROFILE_KEY, RULE_PROFILE_TTL
+from common.rule_profiler import RuleProfiler, live_reports
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+rule_profiler = RuleProfiler(
+    config.RULE_PROFILE_SAMPLE_RATE, window=config.RULE_PROFILE_WINDOW
+)
+
+async def publish_rule_profile(redis_conn, consumer_name: str):
+    """
+    Store this worker's per-campaign stats for the admin profile report and
+    drop the reports of workers that stopped publishing.
+    """
+    if rule_profiler.sample_rate <= 0:
+        return
+    stats = rule_profiler.report()
+    now = time.time()
+    pipe = redis_conn.pipeline(transaction=False)
+    if stats:
+        pipe.hset(
+            RULE_PROFILE_KEY, consumer_name, json.dumps({"at": now, "stats": stats})
+        )
+        pipe.expire(RULE_PROFILE_KEY, RULE_PROFILE_TTL)
+    pipe.hgetall(RULE_PROFILE_KEY)
+    *_, reports = await pipe.execute()
+
+    _, stale = live_reports(reports, now, config.RULE_PROFILE_STALE_AFTER)
+    if stale:
+        await redis_conn.hdel(RULE_PROFILE_KEY, *stale)
+    logger.debug("Published rule profile for %d campaigns", len(stats))
@@ -0,0 +1,41 @@
+import asyncio
+import os
+
+from common.config import config
+from common.startup import StartupTracker
+from worker.db import db, get_session
+from worker.utils.campaign_cache import campaign_cache
+from worker.utils.logger import get_logger
+from worker.utils.window_state import split_legacy_windows
+
+logger = get_logger(__name__)
+
+worker_startup = StartupTracker("worker")
+
+async def warm_up(redis_conn):
+    """Open connections and compile campaigns before the first event is read."""
+    with worker_startup.phase("redis"):
+        # Concurrent pings each check out their own pooled connection
+        pings = (redis_conn.ping() for _ in range(config.REDIS_WARM_CONNECTIONS))
+        await asyncio.gather(*pings)
+    with worker_startup.phase("database"):
+        await db.warm(config.DB_WARM_CONNECTIONS)
+    with worker_startup.phase("campaigns"):
+        async with get_session() as session:
+            await campaign_cache.get(session)
+    with worker_startup.phase("windows"):
+        # Partitions load their own window state when leased
+        await split_legacy_windows(redis_conn)
+
+def mark_ready():
+    """Report ready; the pod's readiness probe checks for WORKER_READY_FILE."""
+    worker_startup.mark_ready()
+    with open(config.WORKER_READY_FILE, "w") as f:
+        f.write(str(os.getpid()))
+
+def mark_not_ready():
+    worker_startup.mark_not_ready()
+    try:
+        os.remove(config.WORKER_READY_FILE)
+    except FileNotFoundError:
+        pass
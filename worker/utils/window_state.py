@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from redis.exceptions import ResponseError
+
+from common.config import config
+from common.constants import WINDOW_CHECKPOINT_KEY
+from common.metrics import rule_window_evictions_total, rule_window_keys
+from common.partitions import partition_for
+from common.windows import SlidingWindowStore
+from worker.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Window state of the partitions this worker consumes. Each partition's state
+# moves with its lease: loaded from `rule_windows:<n>` before the partition's
+# stream is read and flushed back when it is released, so only the current
+# owner ever writes it.
+window_stores: dict[int, SlidingWindowStore] = {}
+
+def checkpoint_key(partition: int) -> str:
+    return f"{WINDOW_CHECKPOINT_KEY}:{partition}"
+
+def _update_key_count():
+    rule_window_keys.set(sum(len(store) for store in window_stores.values()))
+
+async def load_partition_windows(redis_conn, partition: int) -> SlidingWindowStore:
+    """Load a newly leased partition's window state from its checkpoint."""
+    store = SlidingWindowStore(
+        # Same worker-wide bound as before partitioning when one worker owns everything
+        max_keys=max(1, config.WINDOW_MAX_KEYS // config.EVENT_PARTITIONS),
+        buckets_per_window=config.WINDOW_BUCKETS,
+    )
+    store.load(await redis_conn.hgetall(checkpoint_key(partition)))
+    store.drain_changes()
+    window_stores[partition] = store
+    _update_key_count()
+    logger.info(f"Restored {len(store)} rule window entries for partition {partition}")
+    return store
+
+async def _checkpoint(redis_conn, partition: int, store: SlidingWindowStore):
+    rule_window_evictions_total.inc(store.evict_expired())
+    updated, removed = store.drain_changes()
+
+    pipe = redis_conn.pipeline(transaction=False)
+    if updated:
+        pipe.hset(checkpoint_key(partition), mapping=updated)
+    if removed:
+        pipe.hdel(checkpoint_key(partition), *removed)
+    if updated or removed:
+        await pipe.execute()
+
+async def checkpoint_windows(redis_conn, partitions):
+    """Write the window entries of `partitions` changed since the last checkpoint."""
+    for partition in partitions:
+        store = window_stores.get(partition)
+        if store is not None:
+            await _checkpoint(redis_conn, partition, store)
+    _update_key_count()
+
+async def flush_partition_windows(redis_conn, partition: int):
+    """Checkpoint and forget a partition's window state before its lease is released."""
+    store = window_stores.pop(partition, None)
+    if store is not None:
+        await _checkpoint(redis_conn, partition, store)
+    _update_key_count()
+
+def drop_partition_windows(partition: int):
+    """Forget a partition's window state whose lease may already be someone else's."""
+    window_stores.pop(partition, None)
+    _update_key_count()
+
+async def split_legacy_windows(redis_conn):
+    """
+    Move a checkpoint written before partitioning (the single `rule_windows`
+    hash) into the per-partition hashes.
+
+    The hash is renamed first, so only one worker does this. Entries are
+    assigned by their key value the way events are by user_id, the only
+    key windows accept.
+    """
+    claimed = f"{WINDOW_CHECKPOINT_KEY}:legacy"
+    try:
+        await redis_conn.rename(WINDOW_CHECKPOINT_KEY, claimed)
+    except ResponseError:
+        return  # Nothing to move, or another worker took it
+
+    by_partition = defaultdict(dict)
+    for state_key, raw in (await redis_conn.hgetall(claimed)).items():
+        if isinstance(state_key, bytes):
+            state_key = state_key.decode("utf-8")
+        _window, key_value = state_key.split(":", 1)
+        by_partition[partition_for(key_value, config.EVENT_PARTITIONS)][state_key] = raw
+
+    pipe = redis_conn.pipeline(transaction=True)
+    for partition, entries in by_partition.items():
+        pipe.hset(checkpoint_key(partition), mapping=entries)
+    pipe.delete(claimed)
+    await pipe.execute()
+    logger.info(f"Split legacy window checkpoint into {len(by_partition)} partitions")